@@ -0,0 +1,108 @@
+# номинальная длительность кадра игры в мс, под нее подобраны длительности кадров анимаций
+FRAME_MS = 1000 / 60
+# запас на ошибки округления при сравнении времени
+EPSILON = 1e-6
+
+
+class AnimationClock:
+    """
+    Часы анимаций игры: время в мс, которое накапливается из game.dt в начале каждого кадра.
+    У каждой игры свои часы, поэтому новая игра в том же процессе начинает анимации с нуля
+    """
+
+    def __init__(self, max_step=100):
+        """
+        :param max_step: больше этого за один кадр часы не уходят, чтобы после зависания
+            анимации не перескакивали через кадры
+        """
+        self.time = 0.0
+        self.max_step = max_step
+        self.clips = {}
+
+    def advance(self, dt):
+        """
+        :param dt: сколько мс прошло с прошлого кадра
+        """
+        self.time += min(dt, self.max_step)
+
+    def shared_clip(self, key, frames, frame_time):
+        """
+        общий клип этих часов по ключу, создается при первом запросе
+        :param key: ключ, например путь к спрайт-листу и размер
+        :param frames: кадры
+        :param frame_time: длительность кадра в мс
+        :return: объект Clip
+        """
+        clip = self.clips.get(key)
+        if clip is None:
+            clip = self.clips[key] = Clip(frames, frame_time, self)
+        return clip
+
+
+class Timer:
+    """
+    Отсчет периодов от момента запуска по часам игры. Хранится только время следующего
+    срабатывания, между срабатываниями проверка - одно сравнение
+    """
+
+    __slots__ = ('period', 'clock', 'start', 'count', 'next_time')
+
+    def __init__(self, period, clock):
+        """
+        :param period: период в мс
+        :param clock: часы игры AnimationClock
+        """
+        self.period = period
+        self.clock = clock
+        self.restart()
+
+    def restart(self):
+        """
+        отсчет заново от текущего времени
+        """
+        self.start = self.clock.time
+        self.count = 0
+        self.next_time = self.start + self.period
+
+    def ticks(self):
+        """
+        :return: сколько периодов закончилось с прошлой проверки
+        """
+        now = self.clock.time + EPSILON
+        if now < self.next_time:
+            return 0
+        count = int((now - self.start) / self.period)
+        steps = count - self.count
+        self.count = count
+        self.next_time = self.start + (count + 1) * self.period
+        return steps
+
+
+class Clip:
+    """
+    Зацикленная анимация, общая для всех спрайтов: кадр считается по часам игры один раз
+    за кадр игры, поэтому все спрайты клипа показывают один и тот же кадр
+    """
+
+    def __init__(self, frames, frame_time, clock):
+        """
+        :param frames: кадры
+        :param frame_time: длительность кадра в мс
+        :param clock: часы игры AnimationClock
+        """
+        self.frames = frames
+        self.frame_time = frame_time
+        self.clock = clock
+        self.time = None
+        self.current = 0
+
+    def index(self):
+        """
+        :return: номер текущего кадра
+        """
+        time = self.clock.time
+        if self.time != time:
+            self.time = time
+            self.current = int(time / self.frame_time + EPSILON) % len(self.frames)
+        return self.current
+
@@ -0,0 +1,234 @@
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pygame
+
+BUNDLE_DIR = 'assets/bundle'
+MANIFEST_VERSION = 1
+
+# все изображения игры и размеры, в которых их загружает код:
+# None - исходный размер, число - масштаб, кортеж - точный размер
+ASSET_SIZES = (
+    ('assets/player/head', (None,)),
+    ('assets/player/body', (None,)),
+    ('assets/explosion', (0.3, 0.5, 0.7, 0.8)),
+    ('assets/enemies/i-blob.png', (1.7,)),
+    ('assets/enemies/mosquito.png', (2, 3)),
+    ('assets/items', (1.5,)),
+    ('assets/weapons/ammo-1.png', (None,)),
+    ('assets/room/room_rock.png', (None,)),
+    ('assets/room/door-frame.png', (1.9,)),
+    ('assets/room/doors.png', (1.9,)),
+    ('assets/room/full_heart.png', ((40, 40),)),
+    ('assets/room/half_heart.png', ((40, 40),)),
+    ('assets/room/room-background.png', (None,)),
+)
+# цвета фона, которые код делает прозрачными через set_colorkey
+COLOR_KEYS = {
+    'assets/explosion': (68, 36, 52),
+}
+
+image_cache = {}
+_bundle = None
+
+
+def natural_key(path):
+    """
+    ключ сортировки, при котором frame-2 идет раньше frame-10
+    :param path: путь к файлу
+    :return: ключ сортировки
+    """
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', path)]
+
+
+def scaled_size(native_size, size):
+    """
+    итоговый размер изображения, так же как его считает load_image
+    :param native_size: исходный размер
+    :param size: None, масштаб или точный размер
+    :return: кортеж (ширина, высота)
+    """
+    if size is None:
+        return tuple(native_size)
+    if isinstance(size, (float, int)):
+        return tuple(int(i * size) for i in native_size)
+    return tuple(size)
+
+
+def iter_asset_paths():
+    """
+    все изображения из ASSET_SIZES вместе с их размерами
+    :return: генератор пар (путь, размеры)
+    """
+    for path, sizes in ASSET_SIZES:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for file_name in sorted(files, key=natural_key):
+                    if file_name.endswith('.png'):
+                        yield f'{root}/{file_name}'.replace(os.sep, '/'), sizes
+        else:
+            yield path, sizes
+
+
+class AssetBundle:
+    """
+    Собранные build_assets.py атласы с заранее отмасштабированными изображениями
+    """
+
+    def __init__(self, directory=BUNDLE_DIR, executor=None, progress=None):
+        """
+        :param directory: папка с атласами и manifest.json
+        :param executor: пул потоков для параллельной загрузки атласов
+        :param progress: функция progress(загружено, всего)
+        """
+        with open(os.path.join(directory, 'manifest.json')) as file:
+            manifest = json.load(file)
+        if manifest['version'] != MANIFEST_VERSION:
+            raise ValueError(f"Unsupported manifest version: {manifest['version']}")
+        paths = [os.path.join(directory, atlas_name) for atlas_name in manifest['atlases']]
+        if executor is None:
+            self.atlases = [pygame.image.load(path) for path in paths]
+        else:
+            futures = {executor.submit(pygame.image.load, path): i
+                       for i, path in enumerate(paths)}
+            self.atlases = [None] * len(paths)
+            for done, future in enumerate(as_completed(futures), 1):
+                self.atlases[futures[future]] = future.result()
+                if progress is not None:
+                    progress(done, len(paths))
+        self.images = manifest['images']
+        self.directories = manifest['directories']
+
+    def native_size(self, path):
+        """
+        :param path: путь к исходному файлу
+        :return: исходный размер или None, если изображения нет в атласах
+        """
+        image = self.images.get(path)
+        return tuple(image['size']) if image else None
+
+    def get(self, path, size):
+        """
+        изображение из атласа
+        :param path: путь к исходному файлу
+        :param size: итоговый размер
+        :return: поверхность или None, если такого размера нет в атласах
+        """
+        image = self.images.get(path)
+        if image is None:
+            return None
+        frame = image['frames'].get(f'{size[0]}x{size[1]}')
+        if frame is None:
+            return None
+        atlas_index, *rect = frame
+        return self.atlases[atlas_index].subsurface(rect)
+
+    def frames(self, directory):
+        """
+        :param directory: папка с кадрами анимации
+        :return: пути к кадрам по порядку или None
+        """
+        return self.directories.get(directory)
+
+
+def get_bundle():
+    """
+    атласы загружаются один раз при первом обращении, если они собраны
+    :return: объект AssetBundle или None
+    """
+    global _bundle
+    if _bundle is None:
+        if os.path.isfile(os.path.join(BUNDLE_DIR, 'manifest.json')):
+            _bundle = AssetBundle()
+        else:
+            _bundle = False
+    return _bundle or None
+
+
+def list_frames(directory):
+    """
+    пути к кадрам анимации в папке в детерминированном порядке
+    :param directory: папка с кадрами
+    :return: список путей
+    """
+    bundle = get_bundle()
+    frames = bundle.frames(directory) if bundle else None
+    if frames is None:
+        frames = [f'{directory}/{file_name}' for file_name in
+                  sorted(os.listdir(directory), key=natural_key)]
+    return frames
+
+
+def decode(path, size=None):
+    """
+    загрузка изображения с диска
+    :param path: путь к файлу
+    :param size: None, масштаб или точный размер
+    :return: изображение
+    """
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"Unable to find path to image: {path}")
+    image = pygame.image.load(path)
+    if size is not None:
+        image = pygame.transform.scale(image, scaled_size(image.get_size(), size))
+    return image
+
+
+def load(path, size=None):
+    """
+    загрузка изображения из атласа, а если его там нет - с диска
+    :param path: путь к файлу
+    :param size: None, масштаб или точный размер
+    :return: изображение
+    """
+    bundle = get_bundle()
+    native_size = bundle.native_size(path) if bundle else None
+    if native_size is not None:
+        image = bundle.get(path, scaled_size(native_size, size))
+        if image is not None:
+            return image
+    return decode(path, size)
+
+
+def decode_sizes(path, sizes):
+    """
+    загрузка файла с диска во всех нужных размерах, выполняется в потоке пула
+    :param path: путь к файлу
+    :param sizes: размеры
+    :return: список пар (ключ кэша, изображение)
+    """
+    native = decode(path)
+    return [((path, size, False, 0),
+             native if size is None else pygame.transform.scale(
+                 native, scaled_size(native.get_size(), size)))
+            for size in sizes]
+
+
+def preload(progress=None, workers=None):
+    """
+    загрузка всех изображений игры в кэш на пуле потоков, png декодируется в SDL_image
+    без GIL. Результаты складываются в кэш в вызывающем потоке, там же вызывается progress
+    :param progress: функция progress(загружено, всего)
+    :param workers: количество потоков
+    """
+    global _bundle
+    with ThreadPoolExecutor(workers) as executor:
+        if os.path.isfile(os.path.join(BUNDLE_DIR, 'manifest.json')):
+            _bundle = AssetBundle(executor=executor, progress=progress)
+            for path, sizes in iter_asset_paths():
+                for size in sizes:
+                    image = _bundle.get(path, scaled_size(_bundle.native_size(path), size))
+                    if image is not None:
+                        image_cache.setdefault((path, size, False, 0), image)
+            return
+        _bundle = False
+        futures = [executor.submit(decode_sizes, path, sizes)
+                   for path, sizes in iter_asset_paths()]
+        for done, future in enumerate(as_completed(futures), 1):
+            for key, image in future.result():
+                image_cache.setdefault(key, image)
+            if progress is not None:
+                progress(done, len(futures))
@@ -0,0 +1,46 @@
+"""
+Время холодного старта игры до первого кадра: без предзагрузки (изображения
+загружаются по одному при первом обращении) и с параллельной предзагрузкой.
+Каждый запуск идет в отдельном процессе.
+
+запуск из корня проекта: python -m benchmarks.cold_start
+"""
+import statistics
+import subprocess
+import sys
+
+RUNS = 7
+CHILD = '''
+import os, time
+os.environ['SDL_VIDEODRIVER'] = 'dummy'
+start = time.perf_counter()
+from main import MyGame
+game = MyGame(0, headless=True, preload={preload})
+# первая смена комнаты, чтобы учесть загрузки при первом использовании
+game.create_new_room((1, 0), 'any')
+print(time.perf_counter() - start)
+'''
+
+
+def measure(preload):
+    """
+    :param preload: включена ли предзагрузка
+    :return: список времен старта в мс
+    """
+    times = []
+    for i in range(RUNS):
+        output = subprocess.run([sys.executable, '-c', CHILD.format(preload=preload)],
+                                capture_output=True, text=True, check=True).stdout
+        times.append(float(output.split()[-1]) * 1000)
+    return times
+
+
+def main():
+    for preload in (False, True):
+        times = measure(preload)
+        print(f'предзагрузка {"вкл " if preload else "выкл"}: '
+              f'медиана {statistics.median(times):.1f} мс, минимум {min(times):.1f} мс')
+
+
+if __name__ == '__main__':
+    main()
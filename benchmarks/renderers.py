@@ -0,0 +1,60 @@
+"""
+Сравнение способов отрисовки: software (Surface.blits в окно) и texture (текстуры
+SDL_Renderer) при разном числе врагов, в окне размером с кадр и с масштабированием
+в 1920x1080. Без окна SDL использует программный рендерер, поэтому texture здесь
+показывает накладные расходы без видеокарты, а не ее выигрыш.
+
+запуск из корня проекта: python -m benchmarks.renderers
+"""
+import os
+from time import perf_counter
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+from core import BACKENDS
+from inputs import InputSnapshot
+from main import MyGame
+from render import BACKGROUND
+from stress import StressConfig
+
+COUNTS = (10, 100, 400)
+WINDOWS = (None, (1920, 1080))
+FRAMES = 120
+
+
+def measure(backend, count, window_size):
+    """
+    :param backend: способ отрисовки, ключ BACKENDS
+    :param count: количество врагов, поровну слизней и комаров
+    :param window_size: размер окна или None - окно размером с кадр
+    :return: время отрисовки и показа кадра в мс
+    """
+    stress = StressConfig(blobs=count // 2, mosquitoes=count - count // 2, rocks=0.2)
+    game = MyGame(0, stress=stress, headless=True, backend=backend, window_size=window_size)
+    game.player.immortal = True
+    game.create_new_room((1, 0), 'any')
+    total = 0
+    for i in range(FRAMES):
+        game.render_queue.add(BACKGROUND, game.background, (0, 0))
+        game.input = InputSnapshot()
+        game.update()
+        start = perf_counter()
+        game.draw()
+        game.present()
+        total += perf_counter() - start
+    if game.renderer is not None:
+        game.renderer.close()
+    return total / FRAMES * 1000
+
+
+def main():
+    for window_size in WINDOWS:
+        print(f'окно {"{}x{}".format(*window_size) if window_size else "959x540"}')
+        print(f'{"враги":>6} ' + ' '.join(f'{backend + ", мс":>14}' for backend in BACKENDS))
+        for count in COUNTS:
+            times = [measure(backend, count, window_size) for backend in BACKENDS]
+            print(f'{count:>6} ' + ' '.join(f'{time:>14.2f}' for time in times))
+
+
+if __name__ == '__main__':
+    main()
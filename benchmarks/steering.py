@@ -0,0 +1,61 @@
+"""
+Сравнение расчета скоростей врагов по одному объекту и пакетом numpy.
+
+запуск из корня проекта: python -m benchmarks.steering
+"""
+import os
+import random
+from timeit import repeat
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+from main import MyGame
+from creatures import EnemyBlob, EnemyMosquito
+from core import SpriteGroup
+
+
+def fill_room(game, count):
+    """
+    заполнение комнаты врагами в случайных точках
+    :param game: объект игры
+    :param count: количество врагов
+    :return: группа врагов
+    """
+    enemies = SpriteGroup()
+    for i in range(count):
+        coords = (random.randint(155, 760), random.randint(95, 390))
+        if i % 2:
+            enemy = EnemyBlob(coords, game)
+        else:
+            enemy = EnemyMosquito(coords, random.choice(('small', 'big')), game)
+        enemy.collision_direction_x = random.choice(('left', 'right', None))
+        enemy.collision_direction_y = random.choice(('up', 'down', None))
+        enemies.add(enemy)
+    return enemies
+
+
+def main():
+    random.seed(0)
+    game = MyGame()
+    game.room.flow_field.update(game.player.mask_rect.center)
+    print(f'{"враги":>8} {"по объекту, мс":>16} {"пакетом, мс":>13} {"ускорение":>10}')
+    for count in (10, 100, 1000):
+        enemies = fill_room(game, count)
+        enemies_list = list(enemies)
+
+        def per_object():
+            for enemy in enemies_list:
+                enemy.velocity = enemy.get_steering(game)
+
+        def batched():
+            game.room.steering.update(enemies, game)
+
+        number = max(1, 2000 // count)
+        per_object_time = min(repeat(per_object, number=number, repeat=5)) / number * 1000
+        batched_time = min(repeat(batched, number=number, repeat=5)) / number * 1000
+        print(f'{count:>8} {per_object_time:>16.3f} {batched_time:>13.3f} '
+              f'{per_object_time / batched_time:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
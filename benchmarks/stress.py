@@ -0,0 +1,101 @@
+"""
+Рост времени кадра с количеством врагов в нагрузочном режиме: отдельно проверка
+столкновений (проверки масок через кэш пар game.contacts), ИИ (поле направлений и скорости врагов),
+остальное обновление и отрисовка.
+
+запуск из корня проекта: python -m benchmarks.stress
+"""
+import os
+from time import perf_counter
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+from inputs import InputSnapshot
+from main import MyGame
+from stress import StressConfig
+
+COUNTS = (10, 25, 50, 100, 200, 400)
+FRAMES = 60
+
+
+class PhaseTimer:
+    """
+    Подмена функции оберткой, которая копит время ее выполнения
+    """
+
+    def __init__(self, owner, name):
+        """
+        :param owner: объект или модуль, в котором лежит функция
+        :param name: имя функции
+        """
+        self.owner = owner
+        self.name = name
+        self.function = getattr(owner, name)
+        self.total = 0
+        self.calls = 0
+        setattr(owner, name, self)
+
+    def __call__(self, *args, **kwargs):
+        start = perf_counter()
+        try:
+            return self.function(*args, **kwargs)
+        finally:
+            self.total += perf_counter() - start
+            self.calls += 1
+
+    def restore(self):
+        setattr(self.owner, self.name, self.function)
+
+
+def measure(count, rocks):
+    """
+    :param count: количество врагов, поровну слизней и комаров
+    :param rocks: плотность камней
+    :return: словарь со временем фаз в мс на кадр
+    """
+    stress = StressConfig(blobs=count // 2, mosquitoes=count - count // 2, rocks=rocks)
+    game = MyGame(0, stress=stress, headless=True)
+    game.player.immortal = True
+    game.create_new_room((1, 0), 'any')
+    room = game.room
+    collisions = PhaseTimer(game.contacts, 'collide')
+    flow_field = PhaseTimer(room.flow_field, 'update')
+    steering = PhaseTimer(room.steering, 'update')
+    update_time = draw_time = 0
+    for i in range(FRAMES):
+        game.screen.blit(game.background, (0, 0))
+        game.input = InputSnapshot()
+        start = perf_counter()
+        game.update()
+        update_time += perf_counter() - start
+        start = perf_counter()
+        game.draw()
+        draw_time += perf_counter() - start
+    collisions.restore()
+    ai_time = flow_field.total + steering.total
+    return {
+        'entities': sum(len(group) for group in game.groups),
+        'collision': collisions.total / FRAMES * 1000,
+        'collide_calls': collisions.calls // FRAMES,
+        'cached': game.contacts.hit_rate() * 100,
+        'ai': ai_time / FRAMES * 1000,
+        'other': (update_time - collisions.total - ai_time) / FRAMES * 1000,
+        'draw': draw_time / FRAMES * 1000,
+    }
+
+
+def main():
+    for rocks in (0, 0.3):
+        print(f'плотность камней {rocks}')
+        print(f'{"враги":>6} {"сущности":>9} {"столкн., мс":>12} {"вызовов":>9} '
+              f'{"кэш, %":>7} {"ИИ, мс":>7} {"прочее, мс":>11} {"рендер, мс":>11} {"кадр, мс":>9}')
+        for count in COUNTS:
+            result = measure(count, rocks)
+            frame = result['collision'] + result['ai'] + result['other'] + result['draw']
+            print(f'{count:>6} {result["entities"]:>9} {result["collision"]:>12.2f} '
+                  f'{result["collide_calls"]:>9} {result["cached"]:>7.1f} {result["ai"]:>7.2f} '
+                  f'{result["other"]:>11.2f} {result["draw"]:>11.2f} {frame:>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
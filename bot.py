@@ -0,0 +1,188 @@
+from math import hypot
+from random import Random
+
+import pygame
+
+from inputs import Controller
+from pathfinding import FlowField
+
+# часть комнаты, по которой может ходить центр игрока
+WALKABLE = pygame.Rect(170, 125, 620, 285)
+# куда ведет дверь: смещение координат комнаты и кнопка, которой в нее входить
+DOORS = {
+    (450, 25): ((0, 1), pygame.K_w),
+    (80, 210): ((-1, 0), pygame.K_a),
+    (450, 455): ((0, -1), pygame.K_s),
+    (820, 210): ((1, 0), pygame.K_d),
+}
+DIRECTION_KEYS = ((pygame.K_a, pygame.K_d), (pygame.K_w, pygame.K_s))
+ATTACK_KEYS = ((pygame.K_LEFT, pygame.K_RIGHT), (pygame.K_UP, pygame.K_DOWN))
+
+
+class BotController(Controller):
+    """
+    Бот для автоматических прогонов: подбирает сердца, когда ранен, стреляет в ближайшего
+    врага, а в пустой комнате идет к открытой двери, предпочитая непосещенные комнаты.
+    Препятствия обходит по своему полю направлений
+    """
+
+    def __init__(self, seed=0, keep_distance=130, stuck_frames=90):
+        """
+        :param seed: сид для выбора дверей и выхода из тупиков
+        :param keep_distance: ближе этого расстояния бот отходит от врага
+        :param stuck_frames: через сколько кадров без движения бот считает, что застрял
+        """
+        self.random = Random(seed)
+        self.keep_distance = keep_distance
+        self.stuck_frames = stuck_frames
+        self.room = None
+        self.flow_field = None
+        self.door = None
+        self.last_position = None
+        self.still_frames = 0
+        self.escape_keys = ()
+        self.escape_frames = 0
+
+    def read(self, game):
+        from items import FullHeart, HalfHeart
+        events = [event for event in pygame.event.get() if event.type == pygame.QUIT]
+        if game.room is not self.room:
+            self.enter_room(game.room)
+        player = game.player
+        center = player.mask_rect.center
+
+        if self.escape_frames > 0:
+            self.escape_frames -= 1
+            return self.hold(self.escape_keys, events)
+        if center == self.last_position:
+            self.still_frames += 1
+        else:
+            self.still_frames = 0
+        self.last_position = center
+
+        keys = set()
+        enemies = list(game.room.enemy_group)
+        hearts = [item for item in game.items if isinstance(item, (HalfHeart, FullHeart))]
+        wounded = player.health < player.max_health
+        if hearts and wounded and (not enemies or player.health <= player.max_health / 2):
+            keys |= self.walk_to(center, nearest(center, hearts).rect.center)
+        elif enemies:
+            keys |= self.fight(center, nearest(center, enemies).mask_rect.center)
+        elif hearts and wounded:
+            keys |= self.walk_to(center, nearest(center, hearts).rect.center)
+        else:
+            keys |= self.leave_room(game, center)
+
+        if self.still_frames >= self.stuck_frames:
+            self.still_frames = 0
+            self.door = None
+            self.escape_keys = (self.random.choice(DIRECTION_KEYS[0]),
+                                self.random.choice(DIRECTION_KEYS[1]))
+            self.escape_frames = self.random.randint(10, 30)
+        return self.hold(keys, events)
+
+    def enter_room(self, room):
+        """
+        новая комната: поле направлений для игрока по ее камням
+        :param room: объект комнаты
+        """
+        from objects import Rock
+        self.room = room
+        self.door = None
+        self.flow_field = FlowField([sprite.rect for sprite in room if isinstance(sprite, Rock)],
+                                    clearance=30)
+
+    def walk_to(self, center, target):
+        """
+        кнопки движения к цели в обход камней
+        :param center: центр игрока
+        :param target: точка цели
+        :return: множество кнопок
+        """
+        target = (min(max(target[0], WALKABLE.left), WALKABLE.right),
+                  min(max(target[1], WALKABLE.top), WALKABLE.bottom))
+        self.flow_field.update(target)
+        dx, dy = self.flow_field.direction(*center)
+        if not dx and not dy:
+            dx, dy = target[0] - center[0], target[1] - center[1]
+            length = hypot(dx, dy)
+            if length < 4:
+                return set()
+            dx, dy = dx / length, dy / length
+        return direction_keys(dx, dy, DIRECTION_KEYS)
+
+    def fight(self, center, enemy):
+        """
+        стрельба по врагу вдоль оси, по которой он дальше, и выравнивание по другой оси
+        :param center: центр игрока
+        :param enemy: центр врага
+        :return: множество кнопок
+        """
+        dx, dy = enemy[0] - center[0], enemy[1] - center[1]
+        if abs(dx) >= abs(dy):
+            keys = {ATTACK_KEYS[0][dx > 0]}
+            target = (center[0], enemy[1])
+        else:
+            keys = {ATTACK_KEYS[1][dy > 0]}
+            target = (enemy[0], center[1])
+        distance = hypot(dx, dy)
+        if distance < self.keep_distance:
+            # отходим от врага по дуге вокруг центра комнаты, чтобы не зажать себя в угол
+            away_x, away_y = -dx / (distance + 1), -dy / (distance + 1)
+            side_x, side_y = -away_y, away_x
+            if side_x * (WALKABLE.centerx - center[0]) + side_y * (WALKABLE.centery - center[1]) < 0:
+                side_x, side_y = -side_x, -side_y
+            target = (center[0] + (away_x * 0.5 + side_x) * 60,
+                      center[1] + (away_y * 0.5 + side_y) * 60)
+        return keys | self.walk_to(center, target)
+
+    def leave_room(self, game, center):
+        """
+        движение к открытой двери, а у самой двери - шаг в нее
+        :param game: игра
+        :param center: центр игрока
+        :return: множество кнопок
+        """
+        from room import Door
+        if self.door is None:
+            doors = [sprite for sprite in game.room if isinstance(sprite, Door)
+                     and not sprite.is_closed]
+            if not doors:
+                return set()
+            new_doors = [door for door in doors if tuple(
+                a + b for a, b in zip(game.room.coords, DOORS[door.coords][0]))
+                not in game.rooms_seeds_dict]
+            self.door = self.random.choice(new_doors or doors)
+        door_center = self.door.rect.center
+        approach = (min(max(door_center[0], WALKABLE.left), WALKABLE.right),
+                    min(max(door_center[1], WALKABLE.top), WALKABLE.bottom))
+        if hypot(approach[0] - center[0], approach[1] - center[1]) < 12:
+            return {DOORS[self.door.coords][1]}
+        return self.walk_to(center, approach)
+
+
+def nearest(center, sprites):
+    """
+    :param center: точка
+    :param sprites: спрайты
+    :return: ближайший к точке спрайт
+    """
+    return min(sprites, key=lambda sprite: hypot(sprite.rect.centerx - center[0],
+                                                 sprite.rect.centery - center[1]))
+
+
+def direction_keys(dx, dy, keys, threshold=0.38):
+    """
+    перевод направления в кнопки, при малой составляющей кнопка по этой оси не нажимается
+    :param dx: направление по х
+    :param dy: направление по у
+    :param keys: пары кнопок (меньше, больше) по осям х и у
+    :param threshold: порог составляющей
+    :return: множество кнопок
+    """
+    pressed = set()
+    if abs(dx) > threshold:
+        pressed.add(keys[0][dx > 0])
+    if abs(dy) > threshold:
+        pressed.add(keys[1][dy > 0])
+    return pressed
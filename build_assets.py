@@ -0,0 +1,112 @@
+"""
+Сборка атласов: все изображения из assets.ASSET_SIZES масштабируются заранее
+и упаковываются в несколько png с manifest.json, который читает assets.AssetBundle.
+
+запуск из корня проекта: python build_assets.py
+"""
+import json
+import os
+from collections import defaultdict
+
+import pygame
+
+from assets import BUNDLE_DIR, COLOR_KEYS, MANIFEST_VERSION, decode, iter_asset_paths, \
+    scaled_size
+
+ATLAS_WIDTH = 1024
+ATLAS_MAX_HEIGHT = 2048
+PADDING = 1
+
+
+def bake(image, color_key=None):
+    """
+    перевод изображения в формат с альфа каналом, прозрачный цвет становится прозрачностью
+    :param image: изображение
+    :param color_key: цвет, который код делает прозрачным
+    :return: изображение 32 бита с альфа каналом
+    """
+    if image.get_flags() & pygame.SRCALPHA and color_key is None:
+        return image
+    baked = pygame.Surface(image.get_size(), pygame.SRCALPHA, 32)
+    if color_key is not None:
+        image = image.copy()
+        image.set_colorkey(color_key)
+    baked.blit(image, (0, 0))
+    return baked
+
+
+def pack(images):
+    """
+    упаковка изображений полками по высоте
+    :param images: список пар (ключ, изображение)
+    :return: список атласов, каждый - (размер, список (ключ, изображение, позиция))
+    """
+    atlases = []
+    placed = []
+    x = y = shelf_height = 0
+    for key, image in sorted(images, key=lambda item: -item[1].get_height()):
+        width, height = image.get_size()
+        if x + width > ATLAS_WIDTH:
+            x = 0
+            y += shelf_height + PADDING
+            shelf_height = 0
+        if y + height > ATLAS_MAX_HEIGHT:
+            atlases.append(((ATLAS_WIDTH, y), placed))
+            placed = []
+            x = y = shelf_height = 0
+        placed.append((key, image, (x, y)))
+        x += width + PADDING
+        shelf_height = max(shelf_height, height)
+    if placed:
+        atlases.append(((ATLAS_WIDTH, y + shelf_height), placed))
+    return atlases
+
+
+def build(directory=BUNDLE_DIR):
+    """
+    сборка атласов и manifest.json
+    :param directory: папка для результата
+    """
+    os.makedirs(directory, exist_ok=True)
+    groups = defaultdict(list)
+    images = {}
+    directories = defaultdict(list)
+    for path, sizes in iter_asset_paths():
+        native = decode(path)
+        color_key = next((color for prefix, color in COLOR_KEYS.items()
+                          if path.startswith(prefix)), None)
+        opaque = not native.get_flags() & pygame.SRCALPHA and color_key is None and \
+            native.get_colorkey() is None
+        images[path] = {'size': list(native.get_size()), 'frames': {}}
+        directories[os.path.dirname(path)].append(path)
+        for size in sizes:
+            target = scaled_size(native.get_size(), size)
+            image = decode(path, size)
+            if not opaque:
+                image = bake(image, color_key or image.get_colorkey())
+            groups['opaque' if opaque else 'alpha'].append(((path, target), image))
+
+    atlas_names = []
+    for kind in sorted(groups):
+        for atlas_size, placed in pack(groups[kind]):
+            if kind == 'opaque':
+                atlas = pygame.Surface(atlas_size, 0, 24)
+            else:
+                atlas = pygame.Surface(atlas_size, pygame.SRCALPHA, 32)
+            for (path, target), image, position in placed:
+                atlas.blit(image, position, special_flags=pygame.BLEND_RGBA_MAX)
+                images[path]['frames'][f'{target[0]}x{target[1]}'] = \
+                    [len(atlas_names), *position, *target]
+            atlas_name = f'atlas-{len(atlas_names)}.png'
+            pygame.image.save(atlas, os.path.join(directory, atlas_name))
+            atlas_names.append(atlas_name)
+
+    with open(os.path.join(directory, 'manifest.json'), 'w') as file:
+        json.dump({'version': MANIFEST_VERSION, 'atlases': atlas_names, 'images': images,
+                   'directories': directories}, file, indent=1)
+    print(f'Собрано атласов: {len(atlas_names)}, изображений: {len(images)}, '
+          f'вариантов размеров: {sum(len(group) for group in groups.values())}')
+
+
+if __name__ == '__main__':
+    build()
@@ -0,0 +1,128 @@
+import pygame
+
+from metrics import counters
+
+
+def segment_entry(start, delta, rect):
+    """
+    вход отрезка в прямоугольник по методу Лианга-Барски
+    :param start: начало отрезка
+    :param delta: смещение до конца отрезка
+    :param rect: прямоугольник
+    :return: доля пути от 0 до 1, на которой отрезок входит в прямоугольник, или None
+    """
+    enter, leave = 0.0, 1.0
+    for origin, step, lower, upper in ((start[0], delta[0], rect.left, rect.right),
+                                       (start[1], delta[1], rect.top, rect.bottom)):
+        if not step:
+            if not lower <= origin < upper:
+                return None
+            continue
+        near = (lower - origin) / step
+        far = (upper - origin) / step
+        if near > far:
+            near, far = far, near
+        enter = max(enter, near)
+        leave = min(leave, far)
+        if enter >= leave:
+            return None
+    return enter
+
+
+def sweep_segment(start, delta, rects):
+    """
+    непрерывная проверка столкновений: какой прямоугольник первым пересечет отрезок пути
+    точки за кадр. Прямоугольники, в которых точка уже находится, пропускаются
+    :param start: начальная точка
+    :param delta: сдвиг (dx, dy)
+    :param rects: список препятствий
+    :return: (доля пути до входа, индекс препятствия) или None
+    """
+    path = pygame.Rect(min(start[0], start[0] + delta[0]), min(start[1], start[1] + delta[1]),
+                       abs(delta[0]) + 1, abs(delta[1]) + 1)
+    hit = None
+    for index in path.collidelistall(rects):
+        obstacle = rects[index]
+        if obstacle.collidepoint(start):
+            continue
+        fraction = segment_entry(start, delta, obstacle)
+        if fraction is not None and (hit is None or fraction < hit[0]):
+            hit = fraction, index
+    return hit
+
+
+# нет записи в кэше
+_MISSING = object()
+
+
+class ContactCache:
+    """
+    Результаты проверок collide_mask за текущий и прошлый кадр. Результат зависит только от
+    масок и взаимного положения, поэтому ключ - маски пары (у неизменившегося кадра анимации
+    маска та же, см. mask_from_surface) и смещение между спрайтами: пока никто из пары
+    не сдвинулся и не сменил кадр, маски заново не сравниваются
+    """
+
+    def __init__(self):
+        self.current = {}
+        self.previous = {}
+        self.hits = 0
+        self.misses = 0
+        self.reported = (0, 0)
+
+    def collide(self, left, right):
+        """
+        замена pygame.sprite.collide_mask с тем же результатом
+        :param left: первый спрайт
+        :param right: второй спрайт
+        :return: точка пересечения масок или None
+        """
+        try:
+            left_mask = left.mask
+        except AttributeError:
+            left_mask = pygame.mask.from_surface(left.image)
+        try:
+            right_mask = right.mask
+        except AttributeError:
+            right_mask = pygame.mask.from_surface(right.image)
+        left_rect = left.rect
+        right_rect = right.rect
+        # маски в ключе не дают их id достаться новым маскам, пока запись жива
+        key = left_mask, right_mask, right_rect[0] - left_rect[0], right_rect[1] - left_rect[1]
+        result = self.current.get(key, _MISSING)
+        if result is _MISSING:
+            result = self.previous.get(key, _MISSING)
+            if result is _MISSING:
+                self.misses += 1
+                result = left_mask.overlap(right_mask, key[2:])
+            else:
+                self.hits += 1
+            self.current[key] = result
+        else:
+            self.hits += 1
+        return result
+
+    def end_frame(self):
+        """
+        конец кадра: счетчики попаданий в кэш уходят в metrics, пары, которые
+        не проверялись два кадра, забываются
+        """
+        counters['contact.hit'] += self.hits - self.reported[0]
+        counters['contact.miss'] += self.misses - self.reported[1]
+        self.reported = self.hits, self.misses
+        self.previous = self.current
+        self.current = {}
+
+    def clear(self):
+        """
+        очистка, например при смене комнаты
+        """
+        self.current = {}
+        self.previous = {}
+
+    def hit_rate(self):
+        """
+        :return: доля проверок, взятых из кэша
+        """
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
@@ -1,33 +1,92 @@
 from collections import defaultdict
-from random import random
+from random import Random
 from typing import Tuple, Any
+from weakref import WeakKeyDictionary, WeakSet
 import pygame
 import os
 
-
-def load_image(path, size=None):
+import assets
+from animation import FRAME_MS, AnimationClock, Timer
+from collision import ContactCache
+from effects import EffectPool
+from inputs import InputSnapshot, KeyboardController, LatencyTracker, ReplayController
+import pacing
+from metrics import BlitCounter, FrameMetrics, counters
+from pacing import FramePacer
+from render import BACKGROUND, CREATURES, EFFECTS, HUD, STATIC, DownscaledFrame, RenderQueue, \
+    TextureRenderer, blit_on_layer, dynamic_surfaces, mark_dynamic
+from tracing import NullTracer
+
+_silhouettes = WeakKeyDictionary()
+# маски неизменяемых поверхностей, у одного и того же кадра всегда одна и та же маска
+_masks = WeakKeyDictionary()
+_sheet_frames = {}
+
+
+def load_image(path, size=None, flip=False, angle=0):
     """
-    загрузка изображения
+    загрузка изображения, повторные загрузки берутся из кэша, поэтому
+    возвращаемую поверхность нельзя изменять. Отраженные и повернутые варианты
+    тоже считаются один раз и общие для всех объектов
     :param path: путь к файлу
     :param size: размер выходного изображения
+    :param flip: отразить по горизонтали
+    :param angle: угол поворота
     :return: изображение
     """
-    if not os.path.isfile(path):
-        raise FileNotFoundError(f"Unable to find path to image: {path}")
-    image = pygame.image.load(path)
-    if isinstance(size, float) or isinstance(size, int):
-        size = list(map(lambda x: int(x * size), image.get_size()))
-    if size is not None:
-        image = pygame.transform.scale(image, size)
+    if size == 1:
+        size = None
+    key = (path, tuple(size) if isinstance(size, list) else size, flip, angle % 360)
+    counters['load_image'] += 1
+    image = assets.image_cache.get(key)
+    if image is None:
+        counters['load_image.miss'] += 1
+        if flip or key[3]:
+            image = load_image(path, size)
+            if flip:
+                image = pygame.transform.flip(image, True, False)
+            if key[3]:
+                image = pygame.transform.rotate(image, angle)
+        else:
+            image = assets.load(path, size)
+        assets.image_cache[key] = image
     return image
 
 
+def mask_from_surface(surface):
+    """
+    создание маски по изображению, маски неизменяемых изображений берутся из кэша
+    :param surface: изображение
+    :return: маска
+    """
+    if surface in dynamic_surfaces:
+        counters['mask.from_surface'] += 1
+        return pygame.mask.from_surface(surface)
+    mask = _masks.get(surface)
+    if mask is None:
+        counters['mask.from_surface'] += 1
+        mask = _masks[surface] = pygame.mask.from_surface(surface)
+    return mask
+
+
+def create_surface(size, *args):
+    """
+    создание новой поверхности, которую владелец может перерисовывать на месте
+    :param size: размер
+    :param args: флаги и глубина цвета, как у pygame.Surface
+    :return: поверхность
+    """
+    counters['surface.new'] += 1
+    return mark_dynamic(pygame.Surface(size, *args))
+
+
 def get_rect_from_mask(mask):
     """
     получение rect из маски объекта
     :param mask: маска объекта
     :return: объект rect
     """
+    counters['get_rect_from_mask'] += 1
     outline = mask.outline()
     min_x = outline[0][0]
     min_y = outline[0][1]
@@ -46,6 +105,25 @@ def get_rect_from_mask(mask):
     return rect
 
 
+def get_silhouette(image, color=(255, 0, 0), alpha=60):
+    """
+    закрашенный силуэт изображения для вспышки при ударе, считается один раз на кадр анимации
+    :param image: изображение
+    :param color: цвет
+    :param alpha: прозрачность
+    :return: поверхность с силуэтом
+    """
+    silhouettes = _silhouettes.get(image)
+    if silhouettes is None:
+        silhouettes = _silhouettes[image] = {}
+    silhouette = silhouettes.get((color, alpha))
+    if silhouette is None:
+        silhouette = mask_from_surface(image).to_surface(
+            setcolor=(*color, alpha), unsetcolor=(0, 0, 0, 0))
+        silhouettes[(color, alpha)] = silhouette
+    return silhouette
+
+
 def check_doors(default_door_position, room):
     """
     проверяет существует ли дверь в соседней комнате из которой должен будет выйти персонаж
@@ -62,6 +140,14 @@ def check_doors(default_door_position, room):
     return True
 
 
+# способы отрисовки кадра, параметр backend у Game
+BACKENDS = ('software', 'texture')
+SCALE_FILTERS = {
+    'nearest': pygame.transform.scale,
+    'smooth': pygame.transform.smoothscale,
+}
+
+
 class Game:
     room: Any
     interface: Any
@@ -75,21 +161,123 @@ class Game:
     gameover: bool
     background: Any
     rooms_seeds_dict: dict
+    rooms_cleared: dict
     player: Any
+    seed: int
+    random: Random
+    stress: Any = None
+    memory: Any = None
+    tracer: Any = NullTracer()
+    entities: Any
     """класс комнаты"""
 
-    def __init__(self, width: int = 959, height: int = 540, name: str = 'Esaac', fps: int = 60):
+    def __init__(self, width: int = 959, height: int = 540, name: str = 'Esaac', fps: int = 60,
+                 headless: bool = False, recorder=None, replay=None, preload: bool = True,
+                 window_size=None, fullscreen: bool = False, scale_filter: str = 'nearest',
+                 controller=None, backend: str = 'software', render_scale: float = 1):
+        """
+        :param headless: запуск без окна и без ограничения fps, время кадра для анимаций
+            считается номинальным, чтобы прогоны не зависели от скорости машины
+        :param recorder: объект InputRecorder для записи ввода
+        :param replay: объект InputReplay для воспроизведения ввода вместо клавиатуры
+        :param preload: загрузить все изображения в несколько потоков до первого кадра
+        :param window_size: размер окна, кадр рисуется в width x height и масштабируется в окно
+        :param fullscreen: масштабировать кадр на весь экран
+        :param scale_filter: фильтр масштабирования, ключ SCALE_FILTERS
+        :param controller: источник ввода игрока, объект Controller. По умолчанию клавиатура
+            или replay, если он передан
+        :param backend: 'software' - отрисовка Surface.blit, 'texture' - текстуры SDL_Renderer,
+            если их не удалось создать, используется 'software'
+        :param render_scale: доля разрешения, в которой рисуется кадр, например 0.5 для слабых
+            машин. Координаты игры не меняются, кадр растягивается в окно. Только для 'software'
+        """
+        if headless:
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+            fps = 0
         pygame.init()
         pygame.display.set_caption(name)
 
-        self.screen = pygame.display.set_mode((width, height))
+        self.size = (width, height)
+        self.scale = SCALE_FILTERS[scale_filter]
+        self.renderer = None
+        self.downscaled = None
+        if backend == 'texture':
+            try:
+                self.renderer = TextureRenderer(name, self.size, window_size, fullscreen,
+                                                scale_filter, accelerated=not headless)
+            except (ImportError, pygame.error) as error:
+                print(f'Текстурный рендерер недоступен ({error}), используется software')
+        if self.renderer is not None:
+            # кадр собирается из текстур, поверхность нужна только экрану загрузки и смерти
+            self.window = self.frame = None
+            self.screen = create_surface(self.size)
+        else:
+            if fullscreen:
+                self.window = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+            elif window_size is not None:
+                self.window = pygame.display.set_mode(window_size, pygame.RESIZABLE)
+            else:
+                self.window = pygame.display.set_mode(self.size)
+            if render_scale != 1:
+                # очередь рисуется в уменьшенный кадр, screen нужен только экрану загрузки
+                # и смерти
+                self.downscaled = DownscaledFrame(self.size, render_scale)
+                self.frame = create_surface(self.downscaled.size).convert(self.window)
+                self.screen = create_surface(self.size)
+            elif self.window.get_size() == self.size and not window_size:
+                # окно совпадает с кадром, рисуем прямо в него без лишнего копирования
+                self.screen = self.frame = self.window
+            else:
+                self.screen = self.frame = create_surface(self.size).convert(self.window)
+        self._present_target = None
+        self._blit_counter = BlitCounter(self.frame)
+        self.render_queue = RenderQueue()
         self.running = True
         self.clock = pygame.time.Clock()
         self.fps = fps
+        # в режиме без окна время между кадрами постоянное
+        self.fixed_dt = FRAME_MS if headless else None
+        self.dt = self.fixed_dt or 0
+        self.input = InputSnapshot()
+        self.latency = LatencyTracker()
+        self.pacer = FramePacer(fps)
+        self.metrics = FrameMetrics()
+        self.contacts = ContactCache()
+        self.animation_clock = AnimationClock()
+        self.effects = EffectPool(self.animation_clock)
+        self.recorder = recorder
+        self.replay = replay
+        if controller is None:
+            controller = KeyboardController() if replay is None else ReplayController(replay)
+        self.controller = controller
         self._handlers = defaultdict(list)
 
-        self.add_handler(pygame.KEYDOWN, self.player.key_press_handler)
-        self.add_handler(pygame.KEYUP, self.player.stop_move)
+        if preload:
+            assets.preload(self.show_loading)
+        self.setup()
+
+        self.add_handler(pygame.KEYDOWN, self.save_key_handler)
+        self.add_handler(pygame.KEYDOWN, self.memory_key_handler)
+
+    def setup(self):
+        """
+        создание игрока и первой комнаты, вызывается после открытия окна
+        """
+        pass
+
+    def show_loading(self, done, total):
+        """
+        отрисовка полосы загрузки
+        :param done: сколько загружено
+        :param total: сколько всего
+        """
+        self.screen.fill((40, 40, 40))
+        pygame.draw.rect(self.screen, (180, 180, 180), (280, 260, 400, 20), 1)
+        pygame.draw.rect(self.screen, (180, 180, 180), (280, 260, 400 * done // total, 20))
+        self.queue_screen()
+        self.flush()
+        self.present()
+        pygame.event.pump()
 
     def add_object(self, obj):
         """
@@ -110,40 +298,131 @@ class Game:
              (160, 220), 50, (255, 255, 255)).render(self.screen)
         Text(f'Пройдено комнат: {len(self.rooms_seeds_dict.keys()) - 1}', (350, 260),
              50, (255, 255, 255)).render(self.screen)
+        self.queue_screen()
+
+    def queue_screen(self):
+        """
+        в текстурном режиме и в кадре пониженного разрешения нарисованное прямо на screen
+        показывается через очередь
+        """
+        if self.screen is not self.frame:
+            self.render_queue.add(BACKGROUND, self.screen, (0, 0))
 
     def run(self):
         """
         главный цикл программы
         """
+        tracer = self.tracer
         while self.running:
-            if not self.gameover:
-                self.screen.blit(self.background, (0, 0))
-            else:
-                self.gameover_render()
+            with tracer.span('frame'):
+                with tracer.span('read_input'):
+                    snapshot = self.read_input()
+                if snapshot is None:
+                    break
+                with tracer.span('step'):
+                    self.step(snapshot)
+
+                with tracer.span('present'):
+                    self.present()
+                self.latency.presented()
+                with tracer.span('tick'):
+                    dt = self.clock.tick(self.fps)
+                    self.dt = self.fixed_dt or dt
+                if self.replay is None:
+                    self.pacer.record(self.clock.get_rawtime())
+        if self.recorder is not None:
+            self.recorder.save(self)
+        tracer.close()
+        if self.renderer is not None:
+            self.renderer.close()
+        pygame.quit()
 
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.running = False
-                for handler in self._handlers.get(event.type, []):
-                    handler(event)
+    def step(self, snapshot):
+        """
+        один кадр игры без показа на экран
+        :param snapshot: ввод кадра, объект InputSnapshot
+        """
+        if not self.gameover:
+            self.render_queue.add(BACKGROUND, self.background, (0, 0))
+        else:
+            self.gameover_render()
+        self.input = snapshot
+        self.latency.on_input(snapshot)
+        for event in snapshot.events:
+            if event.type == pygame.QUIT:
+                self.running = False
+            for handler in self._handlers.get(event.type, []):
+                handler(event)
+        with self.tracer.span('update'):
             self.update()
 
+        with self.tracer.span('draw'):
             self.draw()
+        self.contacts.end_frame()
+        self.metrics.end_frame(self)
+        if self.memory is not None:
+            self.memory.on_frame(self)
 
-            pygame.display.flip()
-            self.clock.tick(self.fps)
-        pygame.quit()
+    def present(self):
+        """
+        показ кадра: если кадр рисуется отдельно от окна, он масштабируется в окно
+        с сохранением пропорций, по краям остаются черные полосы
+        """
+        if self.renderer is not None:
+            self.renderer.present()
+            return
+        if self.frame is not self.window:
+            window = pygame.display.get_surface()
+            if self._present_target is None or self._present_target[0] is not window or \
+                    self._present_target[1] != window.get_size():
+                scale = min(window.get_width() / self.size[0],
+                            window.get_height() / self.size[1])
+                rect = pygame.Rect(0, 0, int(self.size[0] * scale), int(self.size[1] * scale))
+                rect.center = window.get_rect().center
+                window.fill((0, 0, 0))
+                self.window = window
+                self._present_target = (window, window.get_size(), window.subsurface(rect))
+            target = self._present_target[2]
+            self.scale(self.frame, target.get_size(), target)
+        pygame.display.flip()
+
+    def read_input(self):
+        """
+        снятие ввода кадра с контроллера, один раз в начале кадра
+        :return: объект InputSnapshot или None, если ввод кончился
+        """
+        snapshot = self.controller.read(self)
+        if snapshot is not None and self.recorder is not None:
+            self.recorder.record(snapshot, self.dt, self.pacer.level)
+        return snapshot
 
     def draw(self):
         """
-        отрисока объектов на экран
+        отрисока объектов на экран: объекты рисуют в очередь в слой из своего атрибута layer,
+        очередь выводится на экран одним Surface.blits
         """
+        queue = self.render_queue
         for obj in self.objects:
             if isinstance(obj, SpriteGroup):
                 for i in obj:
-                    i.render(self.screen)
+                    queue.layer = i.layer
+                    i.render(queue)
             else:
-                obj.render(self.screen)
+                queue.layer = obj.layer
+                obj.render(queue)
+        self.effects.render(queue, self.pacer.level)
+        self.flush()
+
+    def flush(self):
+        """
+        вывод очереди отрисовки на экран или в текстурный рендерер
+        """
+        if self.renderer is not None:
+            self.renderer.draw(self.render_queue)
+        elif self.downscaled is not None:
+            self.downscaled.flush(self.render_queue, self._blit_counter)
+        else:
+            self.render_queue.flush(self._blit_counter)
 
     def add_handler(self, event_type, handler):
         """
@@ -153,10 +432,36 @@ class Game:
         """
         self._handlers[event_type].append(handler)
 
+    def save_key_handler(self, event, path='save.bin'):
+        """
+        сохранение на F5 и загрузка на F9, при воспроизведении записи не работают, чтобы
+        результат не зависел от файла на диске
+        :param event: событие нажатия
+        :param path: путь к файлу сохранения
+        """
+        from saves import save_game, load_game
+        if self.replay is not None:
+            return
+        if event.key == pygame.K_F5 and not self.gameover:
+            save_game(self, path)
+        elif event.key == pygame.K_F9 and os.path.isfile(path):
+            load_game(self, path)
+
+    def memory_key_handler(self, event):
+        """
+        отчет о памяти на F8
+        :param event: событие нажатия
+        """
+        from memory import format_report, memory_report
+        if event.key == pygame.K_F8:
+            print(format_report(memory_report(self)))
+
     def update(self):
         """
-        обновление всех объектов
+        обновление всех объектов, часы анимаций и эффекты продвигаются до объектов
         """
+        self.animation_clock.advance(self.dt)
+        self.effects.update()
         for obj in self.objects:
             obj.update(self)
 
@@ -171,6 +476,10 @@ class Game:
         :param default_door_position: дверь которая должна быть у двери
         """
         from room import Room
+        previous = getattr(self, 'room', None)
+        if previous is not None and previous.coords != coords:
+            # запоминаем, остались ли в покидаемой комнате враги
+            self.rooms_cleared[previous.coords] = previous.is_cleared()
         room = Room(coords, self)
         no_default_door = check_doors(default_door_position, room)
         while no_default_door:
@@ -178,8 +487,19 @@ class Game:
             room = Room(coords, self)
             no_default_door = check_doors(default_door_position, room)
 
+        self.set_room(room)
+        self.tracer.instant('room', 'room', {'coords': list(coords)})
+        if self.memory is not None:
+            self.memory.on_room_change(self)
+
+    def set_room(self, room):
+        """
+        установка комнаты текущей и пересоздание групп объектов
+        :param room: объект комнаты
+        """
         self.room = room
-        self.room.coords = coords
+        self.effects.clear()
+        self.contacts.clear()
         self.objects = []
         self.groups = []
         self.physical_group = SpriteGroup()
@@ -197,6 +517,8 @@ class Game:
         """
         self.objects = []
         self.groups = []
+        self.effects.clear()
+        self.contacts.clear()
         self.gameover = True
 
 
@@ -214,8 +536,8 @@ class ItemsSpawner:
         """
         if not self.item_spawned:
             for i in items_list:
-                if random() < i[1]:
-                    game.items.add(i[0](self.mask_rect.center))
+                if game.random.random() < i[1]:
+                    game.entities.create(i[0], self.mask_rect.center, groups=(game.items,))
                     self.item_spawned = True
                     return
             self.item_spawned = True
@@ -237,6 +559,7 @@ class RenderableObject:
     """
     Абстракный класс для описание минимального элемента, который может быть отображён на экране
     """
+    layer = STATIC
 
     def render(self, screen):
         """
@@ -296,6 +619,7 @@ class Text(RenderableObject):
     """
     Обёртка вокруг текста для более удобной отрисовке на экране
     """
+    layer = HUD
 
     def __init__(self, text, pos, font_size=20, color=(40, 40, 40)):
         """
@@ -355,6 +679,7 @@ class SpriteObject(pygame.sprite.Sprite):
     Класс для работы со спрайтом. Любой спрайт ассоциируются с некоторым изображением,
     поэтому для урпощения жизни были добавлены параметры для создания изображения вместе с спрайтом
     """
+    layer = STATIC
 
     def __init__(self, image_path, coords, size=None):
         super().__init__()
@@ -364,7 +689,7 @@ class SpriteObject(pygame.sprite.Sprite):
 
         self.image = load_image(image_path, size)
         self.rect = pygame.Rect(coords[0], coords[1], *self.image.get_size())
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = mask_from_surface(self.image)
         self.mask_rect = get_rect_from_mask(self.mask)
 
     def update(self, game: 'Game'):
@@ -378,6 +703,8 @@ class PhysicalObject(pygame.sprite.Sprite):
     """
     физический объект
     """
+    layer = STATIC
+
     def __init__(self):
         super().__init__()
 
@@ -388,6 +715,7 @@ class PhysicalCreature(pygame.sprite.Sprite):
     """
     физическое существо
     """
+    layer = CREATURES
 
     def __init__(self, *groups):
         super().__init__(*groups)
@@ -400,15 +728,23 @@ class PhysicalCreature(pygame.sprite.Sprite):
         collision = False
         self.is_collision_direction_x_changed = False
         self.is_collision_direction_y_changed = False
+        mask_calls = mask_hits = rect_calls = rect_hits = 0
+        collide = game.contacts.collide
         for objects_group in game.get_groups():
             for obj in objects_group:
                 try:
-                    if pygame.sprite.collide_mask(self, obj):
+                    overlap = collide(self, obj)
+                    # без маски collide падает, такая проверка считается проверкой прямоугольников
+                    mask_calls += 1
+                    if overlap:
+                        mask_hits += 1
                         collided = obj
                     else:
                         continue
                 except AttributeError:
+                    rect_calls += 1
                     if pygame.sprite.collide_rect(self, obj):
+                        rect_hits += 1
                         collided = obj
                     else:
                         continue
@@ -423,6 +759,10 @@ class PhysicalCreature(pygame.sprite.Sprite):
                     else:
                         self.on_collision(collided, game)
                     collision = True
+        counters['collide_mask'] += mask_calls
+        counters['collide_mask.hit'] += mask_hits
+        counters['collide_rect'] += rect_calls
+        counters['collide_rect.hit'] += rect_hits
         if collision:
             if not self.is_collision_direction_x_changed:
                 self.collision_direction_x = None
@@ -484,21 +824,25 @@ class HeartsIncludedCreature:
     """существо с хп"""
     def __init__(self, team, health):
         self.team = team
-        self.already_hurt_by = set()
-        self.show_hurt_surface = pygame.Surface(self.image.get_size())
-        self.show_hurt_surface.fill((0, 255, 0))
-        self.show_hurt_surface.set_colorkey((0, 255, 0))
+        self.already_hurt_by = WeakSet()
         self.is_hurt = False
         self.hurt_delay = 0
         self.max_health = health
         self.health = health
+        # уровень деградации пейсера игры на момент последнего update, render его не знает
+        self.pacing_level = 0
 
     def update(self, game):
-        self.show_hurt_surface.fill((0, 255, 0))
+        self.pacing_level = game.pacer.level
+        mask_calls = mask_hits = 0
+        collide = game.contacts.collide
         for physical_object in game.get_groups():
             for hurt_object in physical_object:
                 try:
-                    if pygame.sprite.collide_mask(self, hurt_object) and hurt_object is not self:
+                    overlap = collide(self, hurt_object)
+                    mask_calls += 1
+                    if overlap and hurt_object is not self:
+                        mask_hits += 1
                         hurt = True
                         if hurt_object.one_punch_object:
                             self.get_hurt(hurt_object)
@@ -512,6 +856,8 @@ class HeartsIncludedCreature:
 
                 if not hurt:
                     self.absence_hurt()
+        counters['collide_mask'] += mask_calls
+        counters['collide_mask.hit'] += mask_hits
 
     def get_hurt(self, hurt_object):
         """
@@ -537,24 +883,42 @@ class HeartsIncludedCreature:
         :param color: цвет
         :param alpha: прозрачность
         """
-        olist = self.mask.outline()
-        self.show_hurt_surface.set_alpha(alpha)
-        pygame.draw.polygon(self.show_hurt_surface, color, olist, 0)
-        screen.blit(self.show_hurt_surface, self.coords)
+        if self.pacing_level >= pacing.SKIP_HURT_OVERLAYS:
+            return
+        blit_on_layer(screen, EFFECTS, get_silhouette(self.image, color, alpha), self.coords)
 
 
 class CutAnimatedSprite(pygame.sprite.Sprite):
-    def __init__(self, path, columns, rows, x, y, size: float = 1, speed: float = 1):
+    def __init__(self, path, columns, rows, x, y, clock, size: float = 1,
+                 frame_time: float = FRAME_MS, shared: bool = False):
+        """
+        :param path: путь к спрайт-листу
+        :param columns: сколько столбцов
+        :param rows: сколько строк
+        :param x: координата х
+        :param y: координата у
+        :param clock: часы игры AnimationClock
+        :param size: размер
+        :param frame_time: длительность кадра в мс
+        :param shared: все спрайты этого листа показывают один кадр по часам игры, иначе
+            анимация идет от создания спрайта
+        """
         super().__init__()
         self.frames = []
-        size_tuple = tuple(int(i * size) for i in load_image(path).get_size())
-        sheet = load_image(path, size_tuple)
-        self.cut_sheet(sheet, columns, rows)
+        frames = _sheet_frames.get((path, columns, rows, size))
+        if frames is None:
+            self.cut_sheet(load_image(path, size), columns, rows)
+            # кадры общие для всех объектов, чтобы для них один раз считались силуэты
+            _sheet_frames[(path, columns, rows, size)] = self.frames[:]
+        else:
+            self.frames = frames[:]
+            self.rect = pygame.Rect(0, 0, *frames[0].get_size())
         self.current_frame = 0
         self.image = self.frames[self.current_frame]
         self.rect = self.rect.move(x, y)
-        self.__counter = 0
-        self.animation_speed = speed
+        self.clip = clock.shared_clip((path, columns, rows, size), self.frames, frame_time) \
+            if shared else None
+        self.timer = Timer(frame_time, clock)
 
     def cut_sheet(self, sheet, columns, rows):
         """
@@ -573,42 +937,58 @@ class CutAnimatedSprite(pygame.sprite.Sprite):
                     frame_location, self.rect.size)))
 
     def update(self, game):
-        self.__counter += self.__counter + 1 * self.animation_speed
-        if self.__counter >= 1:
-            self.current_frame = (self.current_frame + 1) % len(self.frames)
+        """
+        смена кадра по времени, между сменами кадров ничего не делается
+        :param game: игра
+        """
+        if self.clip is not None:
+            index = self.clip.index()
+            if index != self.current_frame:
+                self.current_frame = index
+                self.image = self.frames[index]
+            return
+        steps = self.timer.ticks()
+        if steps:
+            self.current_frame = (self.current_frame + steps) % len(self.frames)
             self.image = self.frames[self.current_frame]
-            self.__counter = 0
 
 
 class AnimatedSprite(pygame.sprite.Sprite):
-    def __init__(self, images_paths, coords,
-                 size=1, current_action='idle', animation_speed: float = 1, color_key=None):
+    def __init__(self, images_paths, coords, clock,
+                 size=1, current_action='idle', frame_time: float = FRAME_MS, color_key=None):
+        """
+        :param images_paths: словарь действие -> пути к кадрам
+        :param coords: координаты
+        :param clock: часы игры AnimationClock
+        :param size: размер
+        :param current_action: начальное действие
+        :param frame_time: длительность кадра в мс
+        :param color_key: прозрачный цвет, ставится кадрам один раз
+        """
         super().__init__()
 
+        self.images_paths = images_paths
+        self.size = size
         self.action_sprites = dict()
         for action, paths in images_paths.items():
             if action not in self.action_sprites.keys():
                 self.action_sprites[action] = []
             images = []
             for sprite_path in paths:
-                if size:
-                    size_tuple = tuple(int(i * size) for i in load_image(sprite_path).get_size())
-                    images.append(load_image(sprite_path, size_tuple))
-                else:
-                    images.append(load_image(sprite_path))
+                image = load_image(sprite_path, size or None)
+                if color_key and image.get_colorkey() is None:
+                    image.set_colorkey(color_key)
+                images.append(image)
             self.action_sprites[action] = images[:]
 
-        self.animation_speed = animation_speed * 0.1
+        self.timer = Timer(frame_time, clock)
         self._started = False
-        self.__counter = 0
         self._index = 0
         self.current_action = current_action
         self.coords = coords
         self.color_key = color_key
 
         self.image = self.action_sprites[self.current_action][self._index]
-        if color_key:
-            self.image.set_colorkey(color_key)
         self.rect = pygame.Rect(self.coords[0], self.coords[1], *self.image.get_size())
         self.mask_rect = self.rect
 
@@ -621,6 +1001,7 @@ class AnimatedSprite(pygame.sprite.Sprite):
         if action != self.current_action:
             self.change_current_action(action)
             self._started = True
+            self.timer.restart()
 
             self._index = 0
 
@@ -642,17 +1023,14 @@ class AnimatedSprite(pygame.sprite.Sprite):
 
     def update(self, game):
         """
-        Простенький вариант для работы анимации
+        смена кадра по времени
+        :param game: игра
         """
         if self.is_started():
-            self.__counter += self.__counter + 1 * self.animation_speed
-
-            if self.__counter >= 1:
-                self._index = (self._index + 1) % len(self.action_sprites[self.current_action])
-                self.__counter = 0
+            steps = self.timer.ticks()
+            if steps:
+                self._index = (self._index + steps) % len(self.action_sprites[self.current_action])
             self.image = self.action_sprites[self.current_action][self._index]
-            if self.color_key:
-                self.image.set_colorkey(self.color_key)
 
     @property
     def index(self):
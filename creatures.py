@@ -1,13 +1,19 @@
 import math
-import os
-from random import randint
+from weakref import WeakSet
 from typing import Dict, List, Any
 
 import pygame
 
+import pacing
+from assets import list_frames
 from objects import Explosion, Tears, PlayerBodyParts
 from core import CutAnimatedSprite, CantHurtObject, HeartsIncludedCreature, \
-    get_rect_from_mask, CanHurtObject, ItemsSpawner, PhysicalCreature
+    get_rect_from_mask, CanHurtObject, ItemsSpawner, PhysicalCreature, get_silhouette, \
+    mask_from_surface, create_surface
+from animation import FRAME_MS, Timer
+from inputs import MOVE_KEYS, PressedKeys
+from render import EFFECTS, blit_on_layer
+from stress import volley_directions
 
 
 class EnemyBlob(CutAnimatedSprite, PhysicalCreature, HeartsIncludedCreature, CantHurtObject,
@@ -19,9 +25,9 @@ class EnemyBlob(CutAnimatedSprite, PhysicalCreature, HeartsIncludedCreature, Can
     player_y: int
     can_attack: bool
 
-    def __init__(self, coords):
-        CutAnimatedSprite.__init__(self, 'assets/enemies/i-blob.png', 4, 3, *coords, size=1.7,
-                                   speed=0.0008)
+    def __init__(self, coords, game):
+        CutAnimatedSprite.__init__(self, 'assets/enemies/i-blob.png', 4, 3, *coords,
+                                   game.animation_clock, size=1.7, frame_time=11 * FRAME_MS)
         PhysicalCreature.__init__(self)
         CantHurtObject.__init__(self)
         ItemsSpawner.__init__(self)
@@ -30,18 +36,20 @@ class EnemyBlob(CutAnimatedSprite, PhysicalCreature, HeartsIncludedCreature, Can
         self.coords = list(coords)
         self.speed = 20
         self.move_delay = 0
+        self.velocity = None
         self.can_move = False
-        self.tears_list = []
+        self.tears_list = WeakSet()
+        self.volley = 1
         self.collision_direction_x = None
         self.collision_direction_y = None
         self.is_killed = False
         self.team = 'enemy'
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = mask_from_surface(self.image)
         self.mask_rect = get_rect_from_mask(self.mask).move(self.coords)
-        self.explosion = Explosion(self, (500, 500), (self.image.get_width() / 3, 30), 0.7)
+        self.explosion = Explosion(self, game, (500, 500), (self.image.get_width() / 3, 30), 0.7)
         self.is_invisible = False
         self.move_delay = 0
-        self.__counter = 0
+        self.wait_timer = Timer(21 * FRAME_MS, game.animation_clock)
         self.wait_counter = 0
         self.is_wait = False
         health = 4
@@ -70,7 +78,7 @@ class EnemyBlob(CutAnimatedSprite, PhysicalCreature, HeartsIncludedCreature, Can
             self.move(game)
         self.frames_handler(game)
         self.explosion.update(game)
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = mask_from_surface(self.image)
         self.mask_rect = get_rect_from_mask(self.mask).move(self.coords)
         if self.hurt_delay >= 1:
             self.is_hurt = False
@@ -96,9 +104,10 @@ class EnemyBlob(CutAnimatedSprite, PhysicalCreature, HeartsIncludedCreature, Can
             self.attack(game)
         elif self.current_frame == 10:
             self.can_move = True
-        elif self.current_frame == 11:
+        elif self.current_frame == 11 and self.wait_counter >= 5:
             self.can_move = False
             self.wait_counter = 0
+            self.wait_timer.restart()
 
     @staticmethod
     def get_player_position(game):
@@ -108,34 +117,46 @@ class EnemyBlob(CutAnimatedSprite, PhysicalCreature, HeartsIncludedCreature, Can
         """
         return game.player.coords
 
+    def get_steering(self, game):
+        """
+        Вычисление шага прыжка по полю направлений комнаты с учетом столкновений
+        :param game: класс игры
+        :return: смещение (dx, dy)
+        """
+        dx, dy = game.room.flow_field.direction(*self.mask_rect.center)
+        if not dx and not dy:
+            dx = game.player.mask_rect.centerx - self.mask_rect.centerx
+            dy = game.player.mask_rect.centery - self.mask_rect.centery
+        step_x = step_y = 0
+        if dy > 0 and self.collision_direction_y != 'down':
+            step_y = self.speed
+        elif dy < 0 and self.collision_direction_y != 'up':
+            step_y = -self.speed
+        if dx > 0 and self.collision_direction_x != 'right':
+            step_x = self.speed
+        elif dx < 0 and self.collision_direction_x != 'left':
+            step_x = -self.speed
+        return step_x, step_y
+
     def move(self, game):
         """
-        Передвижение объекта
+        Передвижение объекта прыжками, шаг берется из пакетного расчета комнаты,
+        если он был сделан в этом кадре
         :param game: класс игры
         """
         if self.move_delay > 1 and self.can_move:
             self.player_x, self.player_y = self.get_player_position(game)
-            if self.player_y > self.coords[1] + randint(0, 80) and self.collision_direction_y \
-               != 'down':
-                self.coords[1] += self.speed
-                for rect in [self.render_rect, self.rect]:
-                    rect.move_ip(0, self.speed)
-            elif self.player_y < self.coords[1] + randint(0, 80) and self.collision_direction_y != \
-                 'up':
-                self.coords[1] -= self.speed
-                for rect in [self.render_rect, self.rect]:
-                    rect.move_ip(0, -self.speed)
-            if self.player_x - 400 > self.coords[0] + randint(-80, 80) < self.player_x + 400 and \
-               self.collision_direction_x != 'right':
-                self.coords[0] += self.speed
-                for rect in [self.render_rect, self.rect]:
-                    rect.move_ip(self.speed, 0)
-            elif self.collision_direction_x != 'left':
-                self.coords[0] -= self.speed
-                for rect in [self.render_rect, self.rect]:
-                    rect.move_ip(-self.speed, 0)
+            if self.velocity is not None:
+                step_x, step_y = self.velocity
+            else:
+                step_x, step_y = self.get_steering(game)
+            self.coords[0] += step_x
+            self.coords[1] += step_y
+            for rect in [self.render_rect, self.rect]:
+                rect.move_ip(step_x, step_y)
             self.move_delay = 0
         self.move_delay += self.move_delay + 0.01
+        self.velocity = None
 
     def attack(self, game):
         """
@@ -151,9 +172,11 @@ class EnemyBlob(CutAnimatedSprite, PhysicalCreature, HeartsIncludedCreature, Can
         dx = dx / dist
         dy = dy / dist
 
-        self.tears_list.append(Tears((int(self.coords[0] + self.rect.width / 2 + 20),
-                                      int(self.coords[1] + self.rect.height / 2 + 45)),
-                                     team='enemy', game=game, dx=dx, dy=dy))
+        for tear_dx, tear_dy in volley_directions(dx, dy, self.volley):
+            self.tears_list.add(game.entities.create(
+                Tears, (int(self.coords[0] + self.rect.width / 2 + 20),
+                        int(self.coords[1] + self.rect.height / 2 + 45)),
+                team='enemy', game=game, dx=tear_dx, dy=tear_dy))
         self.can_attack = False
 
     def on_collision(self, collided_sprite, game):
@@ -183,7 +206,6 @@ class EnemyBlob(CutAnimatedSprite, PhysicalCreature, HeartsIncludedCreature, Can
         :param game: класс игры
         """
         from items import HalfHeart, FullHeart
-        self.explosion.render(game.screen)
         self.explosion.explode()
         if not self.item_spawned:
             self.spawn_items([(HalfHeart, 0.1), (FullHeart, 0.01)], game)
@@ -193,27 +215,27 @@ class EnemyBlob(CutAnimatedSprite, PhysicalCreature, HeartsIncludedCreature, Can
         Ожидание между повторениями прыжка
         """
         self.is_wait = True
-        self.__counter += self.__counter / 3 + self.animation_speed
-        if self.__counter >= 1:
-            self.wait_counter += 1
-            if self.current_frame == 0:
-                self.current_frame = 1
-            else:
-                self.current_frame = 0
+        steps = self.wait_timer.ticks()
+        if steps:
+            self.wait_counter += steps
+            for _ in range(steps):
+                self.current_frame = 1 if self.current_frame == 0 else 0
             self.image = self.frames[self.current_frame]
-            self.__counter = 0
+            if self.wait_counter >= 5:
+                self.timer.restart()
 
 
 class EnemyMosquito(PhysicalCreature, CanHurtObject, HeartsIncludedCreature, CutAnimatedSprite,
                     ItemsSpawner):
     player_position: Any
     """класс комара"""
-    def __init__(self, coords, size):
+    def __init__(self, coords, size, game):
         PhysicalCreature.__init__(self)
         CanHurtObject.__init__(self)
         ItemsSpawner.__init__(self)
         self.is_invisible = False
         self.one_punch_object = False
+        self.size_type = size
         if size == 'big':
             self.speed = 1
             self.damage = 2
@@ -229,15 +251,16 @@ class EnemyMosquito(PhysicalCreature, CanHurtObject, HeartsIncludedCreature, Cut
             health = 3
             explosion_size = 0.5
         CutAnimatedSprite.__init__(self, 'assets/enemies/mosquito.png', 2, 1, *coords,
-                                   size=creature_size,
-                                   speed=0.01)
+                                   game.animation_clock, size=creature_size,
+                                   frame_time=7 * FRAME_MS, shared=True)
         self.coords = list(coords)
         HeartsIncludedCreature.__init__(self, 'enemy', health)
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = mask_from_surface(self.image)
         self.mask_rect = get_rect_from_mask(self.mask)
 
         self.attack_delay = 0.001
-        self.explosion = Explosion(self, self.coords, (35, 40), explosion_size)
+        self.velocity = None
+        self.explosion = Explosion(self, game, self.coords, (35, 40), explosion_size)
         self.is_killed = False
         self.collision_direction_y = None
         self.collision_direction_x = None
@@ -251,30 +274,47 @@ class EnemyMosquito(PhysicalCreature, CanHurtObject, HeartsIncludedCreature, Cut
             screen.blit(self.image, self.rect)
             if self.is_hurt:
                 self.show_hurt(screen)
-        if self.is_killed:
-            self.explosion.render(screen)
 
-    def move(self):
-        """
-        Передвижение объекта
+    def get_steering(self, game):
         """
-        dx = self.rect.x - self.player_position[0] + randint(-80, 80)
-        dy = self.rect.y - self.player_position[1] + randint(-80, 80)
-
-        dist = math.hypot(dx, dy)
-        dx /= dist + 1
-        dy /= dist + 1
-        if dx > 0 and self.collision_direction_x == 'left':
+        Вычисление скорости по полю направлений комнаты с учетом столкновений
+        :param game: класс игры
+        :return: скорость (dx, dy)
+        """
+        dx, dy = game.room.flow_field.direction(*self.mask_rect.center)
+        if not dx and not dy:
+            # клетка игрока или недостижимая клетка, летим к игроку напрямую
+            dx = game.player.mask_rect.centerx - self.mask_rect.centerx
+            dy = game.player.mask_rect.centery - self.mask_rect.centery
+            dist = math.hypot(dx, dy)
+            dx /= dist + 1
+            dy /= dist + 1
+        dx += game.random.randint(-20, 20) / 100
+        dy += game.random.randint(-20, 20) / 100
+        if dx < 0 and self.collision_direction_x == 'left':
             dx = 0
-        elif dx < 0 and self.collision_direction_x == 'right':
+        elif dx > 0 and self.collision_direction_x == 'right':
             dx = 0
 
-        if dy > 0 and self.collision_direction_y == 'up':
+        if dy < 0 and self.collision_direction_y == 'up':
             dy = 0
-        elif dy < 0 and self.collision_direction_y == 'down':
+        elif dy > 0 and self.collision_direction_y == 'down':
             dy = 0
-        self.coords[0] += dx * self.speed * -1
-        self.coords[1] += dy * self.speed * -1
+        return dx * self.speed, dy * self.speed
+
+    def move(self, game):
+        """
+        Передвижение объекта, скорость берется из пакетного расчета комнаты,
+        если он был сделан в этом кадре
+        :param game: класс игры
+        """
+        if self.velocity is not None:
+            dx, dy = self.velocity
+        else:
+            dx, dy = self.get_steering(game)
+        self.velocity = None
+        self.coords[0] += dx
+        self.coords[1] += dy
         for rect in [self.rect]:
             rect.x = self.coords[0]
             rect.y = self.coords[1]
@@ -286,7 +326,7 @@ class EnemyMosquito(PhysicalCreature, CanHurtObject, HeartsIncludedCreature, Cut
         """
         from items import HalfHeart, FullHeart
         self.player_position = game.player.coords
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = mask_from_surface(self.image)
         self.mask_rect = get_rect_from_mask(self.mask).move(self.coords)
         CutAnimatedSprite.update(self, game)
         HeartsIncludedCreature.update(self, game)
@@ -294,10 +334,10 @@ class EnemyMosquito(PhysicalCreature, CanHurtObject, HeartsIncludedCreature, Cut
         if self.hurt_delay >= 1:
             self.is_hurt = False
         self.hurt_delay += self.hurt_delay / 3 + 0.01
-        self.move()
+        self.move(game)
 
         self.attack_delay += self.attack_delay / 5 + self.attack_speed
-        if self.attack_delay >= 1 and pygame.sprite.collide_mask(self, game.player):
+        if self.attack_delay >= 1 and game.contacts.collide(self, game.player):
             self.attack(game.player)
         if self.is_killed:
             self.explosion.update(game)
@@ -334,7 +374,7 @@ class Player(PhysicalCreature, CantHurtObject, HeartsIncludedCreature):
     mask: pygame.mask.Mask
     """класс игрока"""
 
-    def __init__(self, coords: tuple):
+    def __init__(self, coords: tuple, game):
 
         CantHurtObject.__init__(self)
 
@@ -342,31 +382,32 @@ class Player(PhysicalCreature, CantHurtObject, HeartsIncludedCreature):
         head_sprite_map: Dict[str, List[str]] = dict()
         for action_folder in ('idle', 'walking-x', 'walking-down', 'walking-up', 'attack-x',
                               'attack-up', 'attack-down'):
-            head_sprite_map[action_folder] = [f'assets/player/head/{action_folder}/{i}' for i in
-                                              os.listdir(f'assets/player/head/{action_folder}')]
+            head_sprite_map[action_folder] = list_frames(f'assets/player/head/{action_folder}')
 
         body_sprite_map: Dict[str, List[str]] = dict()
         for action_folder in ('idle', 'walking-x', 'walking-down', 'walking-up'):
-            body_sprite_map[action_folder] = [f'assets/player/body/{action_folder}/{i}' for i in
-                                              os.listdir(f'assets/player/body/{action_folder}')]
+            body_sprite_map[action_folder] = list_frames(f'assets/player/body/{action_folder}')
 
         self.head_sprite = PlayerBodyParts(head_sprite_map, (coords[0], coords[1]), self,
-                                           animation_speed=0.001)
+                                           game.animation_clock, frame_time=14 * FRAME_MS)
 
         self.body_sprite = PlayerBodyParts(body_sprite_map, (coords[0] + 10, coords[1] + 39),
-                                           self, animation_speed=0.001)
+                                           self, game.animation_clock, frame_time=14 * FRAME_MS)
 
         self.coords = list(coords)
         self.direction_x = None
         self.direction_y = None
 
         self.speed = 4
+        self.pressed_keys = PressedKeys()
+        # без урона, для долгих автоматических прогонов
+        self.immortal = False
 
-        self.ammos_list = list()
+        self.ammos_list = WeakSet()
 
         self.attack_speed= 0.05
 
-        self.image = pygame.Surface((self.head_sprite.image.get_width(),
+        self.image = create_surface((self.head_sprite.image.get_width(),
                                      self.head_sprite.image.get_height() +
                                      self.body_sprite.image.get_height()))
         self.image.fill((0, 255, 0))
@@ -377,14 +418,14 @@ class Player(PhysicalCreature, CantHurtObject, HeartsIncludedCreature):
                                  self.head_sprite.image.get_width(),
                                  self.head_sprite.image.get_height() +
                                  self.body_sprite.image.get_height()))
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = mask_from_surface(self.image)
         self.collision_direction_x = None
         self.collision_direction_y = None
 
         self.is_attack = False
         self.is_killed = False
         self.is_stopped = False
-        self.explosion = Explosion(self, self.coords, (70, 55), 0.8, 0.5)
+        self.explosion = Explosion(self, game, self.coords, (70, 55), 0.8, 5 * FRAME_MS)
         health = 10
         PhysicalCreature.__init__(self)
         HeartsIncludedCreature.__init__(self, 'player', health)
@@ -407,26 +448,42 @@ class Player(PhysicalCreature, CantHurtObject, HeartsIncludedCreature):
         elif event.key == pygame.K_s:
             self.direction_y = 'down'
 
+    def handle_input(self, game):
+        """
+        применение ввода кадра, снятого игрой один раз за кадр
+        :param game: игра
+        """
+        snapshot = game.input
+        self.pressed_keys = snapshot.pressed
+        released = False
+        for event in snapshot.events:
+            if event.type == pygame.KEYDOWN:
+                self.key_press_handler(event)
+                if event.key in MOVE_KEYS and not self.is_stopped:
+                    game.latency.effect(event.key)
+            elif event.type == pygame.KEYUP:
+                released = True
+        if released:
+            self.stop_move()
+
     def stop_move(self, event=None):
         """
         Остановка передвижения
         :param event: Какая кнопка нажата
         """
-        keys = pygame.key.get_pressed()
-        for i in [zip((pygame.K_a, pygame.K_d), ('left', 'right')),
-                  zip((pygame.K_w, pygame.K_s), ('up', 'down'))]:
-            i = list(i)
-            if keys[i[0][0]] and not keys[i[1][0]]:
-                self.direction_x = i[0][1]
-            elif keys[i[1][0]] and not keys[i[0][0]]:
-                self.direction_x = i[1][1]
-        if not len(list(filter(lambda x: x, [keys[pygame.K_a], keys[pygame.K_d]]))):
+        keys = self.pressed_keys
+        left, right = keys[pygame.K_a], keys[pygame.K_d]
+        up, down = keys[pygame.K_w], keys[pygame.K_s]
+        if left != right:
+            self.direction_x = 'left' if left else 'right'
+        elif not left:
             self.direction_x = None
-        if not len(list(filter(lambda x: x, [keys[pygame.K_s], keys[pygame.K_w]]))):
+        if up != down:
+            self.direction_y = 'up' if up else 'down'
+        elif not up:
             self.direction_y = None
 
-        if not len(list(filter(lambda x: x, [keys[pygame.K_a], keys[pygame.K_d], keys[pygame.K_s],
-                                             keys[pygame.K_w]]))):
+        if not (left or right or up or down):
             if not self.is_attack:
                 self.head_sprite.start('idle')
             self.body_sprite.start('idle')
@@ -438,16 +495,29 @@ class Player(PhysicalCreature, CantHurtObject, HeartsIncludedCreature):
         """
         screen.blit(self.image, self.rect)
 
-        if self.is_killed:
-            self.explosion.render(screen)
-        elif self.is_hurt and not self.is_invisible:
+        if self.is_hurt and not self.is_killed and not self.is_invisible:
             self.show_hurt(screen)
 
+    def show_hurt(self, screen, color=(255, 0, 0), alpha=60):
+        """
+        показать удар, силуэты головы и тела берутся из кэша по текущим кадрам
+        :param screen: экран
+        :param color: цвет
+        :param alpha: прозрачность
+        """
+        if self.pacing_level >= pacing.SKIP_HURT_OVERLAYS:
+            return
+        blit_on_layer(screen, EFFECTS, get_silhouette(self.body_sprite.image, color, alpha),
+                      (self.coords[0] + 10, self.coords[1] + 39))
+        blit_on_layer(screen, EFFECTS, get_silhouette(self.head_sprite.image, color, alpha),
+                      self.coords)
+
     def update(self, game):
         """
         Обновление объекта
         :param game: класс игры
         """
+        self.handle_input(game)
         if self.is_attack:
             update_body_parts = (self.body_sprite,)
         else:
@@ -480,7 +550,7 @@ class Player(PhysicalCreature, CantHurtObject, HeartsIncludedCreature):
         self.body_sprite.update(game)
         self.head_sprite.update(game)
 
-        self.image = pygame.Surface((self.head_sprite.image.get_width(),
+        self.image = create_surface((self.head_sprite.image.get_width(),
                                      self.head_sprite.image.get_height() +
                                      self.body_sprite.image.get_height()))
         self.image.fill((0, 255, 0))
@@ -552,31 +622,35 @@ class Player(PhysicalCreature, CantHurtObject, HeartsIncludedCreature):
         self.attack_delay += self.attack_delay / 2.5 + self.attack_speed * 0.0001
         if self.attack_delay < 1:
             return
-        keys = pygame.key.get_pressed()
+        keys = self.pressed_keys
         if keys[pygame.K_LEFT]:
             self.head_sprite.action_sprites = self.head_sprite.left_sprites
             self.head_sprite.start(action='attack-x')
-            self.ammos_list.append(Tears(self.head_sprite.rect.center, team, game, 'left',
-                                         self.direction_y))
+            self.ammos_list.add(game.entities.create(Tears, self.head_sprite.rect.center, team,
+                                                     game, 'left', self.direction_y))
+            game.latency.effect(pygame.K_LEFT)
             self.attack_delay = 0
             self.is_attack = True
         elif keys[pygame.K_RIGHT]:
             self.head_sprite.action_sprites = self.head_sprite.right_sprites
             self.head_sprite.start(action='attack-x')
-            self.ammos_list.append(Tears(self.head_sprite.rect.center, team, game, 'right',
-                                         self.direction_y))
+            self.ammos_list.add(game.entities.create(Tears, self.head_sprite.rect.center, team,
+                                                     game, 'right', self.direction_y))
+            game.latency.effect(pygame.K_RIGHT)
             self.attack_delay = 0
             self.is_attack = True
         elif keys[pygame.K_UP]:
             self.head_sprite.start(action='attack-up')
-            self.ammos_list.append(Tears(self.head_sprite.rect.center, team, game, self.direction_x,
-                                         'up'))
+            self.ammos_list.add(game.entities.create(Tears, self.head_sprite.rect.center, team,
+                                                     game, self.direction_x, 'up'))
+            game.latency.effect(pygame.K_UP)
             self.attack_delay = 0
             self.is_attack = True
         elif keys[pygame.K_DOWN]:
             self.head_sprite.start(action='attack-down')
-            self.ammos_list.append(Tears(self.head_sprite.rect.center, team, game, self.direction_x,
-                                         'down'))
+            self.ammos_list.add(game.entities.create(Tears, self.head_sprite.rect.center, team,
+                                                     game, self.direction_x, 'down'))
+            game.latency.effect(pygame.K_DOWN)
             self.attack_delay = 0
             self.is_attack = True
         else:
@@ -594,12 +668,24 @@ class Player(PhysicalCreature, CantHurtObject, HeartsIncludedCreature):
         Получить урон
         :param hurt_object: от какого объекта получен урон
         """
+        if self.immortal:
+            return
         if (isinstance(hurt_object, Tears) or isinstance(hurt_object, EnemyMosquito)) and \
            hurt_object not in self.already_hurt_by and hurt_object.team == 'enemy':
             HeartsIncludedCreature.get_hurt(self, hurt_object)
         if self.health <= 0:
             self.is_killed = True
 
+    def revive(self):
+        """
+        Возвращение к жизни, нужно при загрузке сохранения после смерти
+        """
+        self.is_killed = False
+        self.is_stopped = False
+        self.is_invisible = False
+        self.is_hurt = False
+        self.explosion.reset()
+
     def heal(self, health):
         """
         Повысить колво хп
@@ -0,0 +1,158 @@
+import numpy as np
+
+import pacing
+from animation import EPSILON
+from metrics import counters
+from render import EFFECTS
+
+# наборы кадров эффектов, общие для всех игр: кадры загружаются один раз на ключ
+sheets = []
+sheet_ids = {}
+sheet_lengths = np.zeros(0, dtype=np.int16)
+
+
+def sheet(key, load):
+    """
+    номер набора кадров, кадры загружаются один раз на ключ
+    :param key: ключ набора, например путь и размер
+    :param load: функция без аргументов, возвращающая список кадров
+    :return: номер набора
+    """
+    global sheet_lengths
+    sheet_id = sheet_ids.get(key)
+    if sheet_id is None:
+        sheet_id = sheet_ids[key] = len(sheets)
+        sheets.append(load())
+        sheet_lengths = np.array([len(frames) for frames in sheets], dtype=np.int16)
+    return sheet_id
+
+
+class EffectPool:
+    """
+    Все активные эффекты комнаты одной игры в параллельных массивах numpy: набор кадров, кадр, время
+    запуска, длительность кадра и координаты. Эффекты продвигаются одним векторным шагом в начале
+    кадра и рисуются одним проходом, освободившиеся места используются повторно
+    """
+
+    def __init__(self, clock, capacity=64):
+        """
+        :param clock: часы игры AnimationClock
+        :param capacity: начальный размер массивов, при нехватке удваивается
+        """
+        self.clock = clock
+        self.allocate(capacity)
+
+    def allocate(self, capacity):
+        """
+        создание пустых массивов
+        :param capacity: размер
+        """
+        self.active = np.zeros(capacity, dtype=bool)
+        self.sheet_index = np.zeros(capacity, dtype=np.int16)
+        self.frame = np.zeros(capacity, dtype=np.int16)
+        self.start = np.zeros(capacity)
+        self.frame_time = np.ones(capacity)
+        self.position = np.zeros((capacity, 2))
+        self.generation = np.zeros(capacity, dtype=np.int64)
+
+    def grow(self):
+        """
+        удвоение размера массивов с сохранением эффектов
+        """
+        old = (self.active, self.sheet_index, self.frame, self.start, self.frame_time,
+               self.position, self.generation)
+        self.allocate(len(self.active) * 2)
+        for new, array in zip((self.active, self.sheet_index, self.frame, self.start,
+                               self.frame_time, self.position, self.generation), old):
+            new[:len(array)] = array
+
+    def spawn(self, sheet_id, position, frame_time):
+        """
+        запуск эффекта
+        :param sheet_id: номер набора кадров из sheet
+        :param position: координаты левого верхнего угла
+        :param frame_time: длительность кадра в мс
+        :return: ручка эффекта (место, поколение)
+        """
+        free = np.flatnonzero(~self.active)
+        if not len(free):
+            self.grow()
+            free = np.flatnonzero(~self.active)
+        slot = free[0]
+        self.active[slot] = True
+        self.sheet_index[slot] = sheet_id
+        self.frame[slot] = 0
+        self.start[slot] = self.clock.time
+        self.frame_time[slot] = frame_time
+        self.position[slot] = position
+        self.generation[slot] += 1
+        counters['effect.spawn'] += 1
+        return slot, self.generation[slot]
+
+    def frame_of(self, handle):
+        """
+        :param handle: ручка эффекта
+        :return: текущий кадр или None, если эффект закончился
+        """
+        slot, generation = handle
+        if self.active[slot] and self.generation[slot] == generation:
+            return int(self.frame[slot])
+        return None
+
+    def move(self, handle, position):
+        """
+        перемещение эффекта вслед за объектом
+        :param handle: ручка эффекта
+        :param position: координаты левого верхнего угла
+        """
+        slot, generation = handle
+        if self.generation[slot] == generation:
+            self.position[slot] = position
+
+    def stop(self, handle):
+        """
+        досрочное завершение эффекта
+        :param handle: ручка эффекта
+        """
+        slot, generation = handle
+        if self.generation[slot] == generation:
+            self.active[slot] = False
+
+    def update(self):
+        """
+        кадры всех эффектов по времени от запуска, после последнего кадра место освобождается
+        """
+        active = self.active
+        if not active.any():
+            return
+        frame = ((self.clock.time - self.start) / self.frame_time + EPSILON).astype(np.int16)
+        self.frame = np.where(active, frame, 0)
+        active &= self.frame < sheet_lengths[self.sheet_index]
+
+    def render(self, queue, level=0):
+        """
+        отрисовка всех эффектов в слой эффектов
+        :param queue: очередь отрисовки RenderQueue
+        :param level: уровень деградации пейсера игры
+        """
+        visible = self.active
+        if level >= pacing.DROP_EXPLOSION_FRAMES:
+            # под нагрузкой показывается только каждый второй кадр
+            visible = visible & (self.frame % 2 == 0)
+        slots = np.flatnonzero(visible)
+        if not len(slots):
+            return
+        queue.layer = EFFECTS
+        queue.blits([(sheets[sheet][frame], (x, y)) for sheet, frame, (x, y) in
+                     zip(self.sheet_index[slots].tolist(), self.frame[slots].tolist(),
+                         self.position[slots].tolist())])
+
+    def clear(self):
+        """
+        завершение всех эффектов, например при смене комнаты
+        """
+        self.active[:] = False
+
+    def __len__(self):
+        return int(self.active.sum())
+
@@ -0,0 +1,170 @@
+"""
+Ферма прогонов: много игр с разными сидами без окна на пуле процессов,
+каждой управляет бот или случайный игрок, результаты сводятся в общую статистику.
+
+запуск из корня проекта: python farm.py --runs 200 --frames 3000
+"""
+import json
+import os
+from argparse import ArgumentParser
+from multiprocessing import Pool
+from random import Random
+from statistics import median
+from time import perf_counter
+
+try:
+    import resource
+except ImportError:
+    # модуля нет в Windows, пик памяти там не считается
+    resource = None
+
+import pygame
+
+from bot import BotController
+from inputs import ATTACK_KEYS, MOVE_KEYS, Controller
+
+BUCKET_MS = 0.25
+BUCKETS = 400
+
+
+class ScriptedDriver(Controller):
+    """
+    Случайный игрок: раз в несколько кадров случайно меняет направление движения и стрельбы
+    """
+
+    def __init__(self, seed, hold=(10, 60)):
+        """
+        :param seed: сид, от него зависят все нажатия
+        :param hold: сколько кадров держать выбранные кнопки, от и до
+        """
+        self.random = Random(seed)
+        self.hold_frames = hold
+        self.keys = set()
+        self.frames_left = 0
+
+    def read(self, game):
+        if self.frames_left > 0:
+            self.frames_left -= 1
+        else:
+            self.frames_left = self.random.randint(*self.hold_frames)
+            self.keys = {key for key in MOVE_KEYS if self.random.random() < 0.3}
+            if self.random.random() < 0.7:
+                self.keys.add(self.random.choice(ATTACK_KEYS))
+        return self.hold(self.keys)
+
+
+DRIVERS = {
+    'bot': BotController,
+    'random': ScriptedDriver,
+}
+
+
+def play(task):
+    """
+    один прогон, выполняется в отдельном процессе
+    :param task: сид, максимум кадров, имя управляющего из DRIVERS и бессмертие игрока
+    :return: словарь с результатами прогона
+    """
+    seed, max_frames, driver_name, immortal = task
+    from main import MyGame
+    from pacing import FramePacer
+
+    driver = DRIVERS[driver_name](seed)
+    game = MyGame(seed, headless=True, controller=driver)
+    game.player.immortal = immortal
+    frame_times = FramePacer(0, BUCKET_MS, BUCKETS)
+    started = perf_counter()
+    frames = 0
+    while game.running and not game.gameover and frames < max_frames:
+        frame_start = perf_counter()
+        game.step(game.read_input())
+        frame_times.record((perf_counter() - frame_start) * 1000)
+        frames += 1
+    # текущая комната попадает в rooms_cleared только при выходе из нее
+    rooms_cleared = {**game.rooms_cleared, game.room.coords: game.room.is_cleared()}
+    result = {
+        'seed': seed,
+        'frames': frames,
+        'rooms_cleared': sum(rooms_cleared.values()),
+        'died': game.gameover,
+        'seconds': perf_counter() - started,
+        'histogram': frame_times.histogram,
+        # ru_maxrss в Linux в килобайтах
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        if resource else 0,
+    }
+    pygame.quit()
+    return result
+
+
+def aggregate(results):
+    """
+    сводка результатов всех прогонов
+    :param results: список словарей play
+    :return: словарь со сводкой
+    """
+    from pacing import FramePacer
+
+    frame_times = FramePacer(0, BUCKET_MS, BUCKETS)
+    for result in results:
+        frame_times.histogram = [a + b for a, b in zip(frame_times.histogram,
+                                                        result['histogram'])]
+    rooms = [result['rooms_cleared'] for result in results]
+    peak_rss = [result['peak_rss_mb'] for result in results]
+    return {
+        'runs': len(results),
+        'frames': sum(result['frames'] for result in results),
+        'rooms_cleared_mean': sum(rooms) / len(rooms),
+        'rooms_cleared_max': max(rooms),
+        'deaths': sum(result['died'] for result in results),
+        'frame_ms_p50': frame_times.percentile(50),
+        'frame_ms_p95': frame_times.percentile(95),
+        'frame_ms_p99': frame_times.percentile(99),
+        'peak_rss_mb_median': median(peak_rss),
+        'peak_rss_mb_max': max(peak_rss),
+        'slowest_seeds': [result['seed'] for result in
+                          sorted(results, key=lambda result: -result['seconds'] /
+                                 max(result['frames'], 1))[:5]],
+    }
+
+
+def parse_args():
+    parser = ArgumentParser(description='Прогон множества игр без окна')
+    parser.add_argument('--runs', type=int, default=100, help='количество прогонов')
+    parser.add_argument('--frames', type=int, default=3000, help='максимум кадров в прогоне')
+    parser.add_argument('--seed', type=int, default=0, help='сид первого прогона')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='количество процессов')
+    parser.add_argument('--driver', choices=sorted(DRIVERS), default='bot',
+                        help='кто управляет игроком')
+    parser.add_argument('--immortal', action='store_true',
+                        help='игрок не получает урон, для долгих прогонов по комнатам')
+    parser.add_argument('--json', metavar='PATH', help='сохранить результаты всех прогонов')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    tasks = [(args.seed + i, args.frames, args.driver, args.immortal)
+             for i in range(args.runs)]
+    started = perf_counter()
+    # каждый прогон в свежем процессе, чтобы пик памяти относился к одной игре
+    with Pool(args.workers, maxtasksperchild=1) as pool:
+        results = []
+        for result in pool.imap_unordered(play, tasks):
+            results.append(result)
+            print(f"\r{len(results)}/{args.runs}", end='', flush=True)
+    print()
+    summary = aggregate(results)
+    print(f"Прогонов: {summary['runs']} за {perf_counter() - started:.1f} с, "
+          f"кадров: {summary['frames']}")
+    print(f"Зачищено комнат в среднем: {summary['rooms_cleared_mean']:.2f}, "
+          f"максимум: {summary['rooms_cleared_max']}, смертей: {summary['deaths']}")
+    print(f"Время кадра, мс: 50% до {summary['frame_ms_p50']}, "
+          f"95% до {summary['frame_ms_p95']}, 99% до {summary['frame_ms_p99']}")
+    print(f"Пик памяти процесса, МБ: медиана {summary['peak_rss_mb_median']:.1f}, "
+          f"максимум {summary['peak_rss_mb_max']:.1f}")
+    print(f"Самые медленные сиды: {summary['slowest_seeds']}")
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump({'summary': summary, 'runs': results}, file)
@@ -0,0 +1,167 @@
+from collections import deque
+from time import perf_counter
+
+import pygame
+
+MOVE_KEYS = (pygame.K_a, pygame.K_d, pygame.K_w, pygame.K_s)
+ATTACK_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN)
+INPUT_KEYS = MOVE_KEYS + ATTACK_KEYS
+
+
+class PressedKeys:
+    """
+    Состояние зажатых кнопок, которое ведет себя как результат pygame.key.get_pressed()
+    """
+
+    def __init__(self, keys=()):
+        """
+        :param keys: зажатые кнопки
+        """
+        self.keys = frozenset(keys)
+
+    def __getitem__(self, key):
+        return key in self.keys
+
+    @classmethod
+    def from_pygame(cls, pressed):
+        """
+        снятие состояния с результата pygame.key.get_pressed()
+        :param pressed: результат pygame.key.get_pressed()
+        :return: объект PressedKeys
+        """
+        return cls(key for key in INPUT_KEYS if pressed[key])
+
+
+class InputSnapshot:
+    """
+    Весь ввод кадра, снимается один раз в начале кадра и дальше только читается
+    """
+
+    def __init__(self, events=(), pressed=PressedKeys(), time=None):
+        """
+        :param events: события кадра
+        :param pressed: состояние зажатых кнопок
+        :param time: момент снятия ввода по perf_counter
+        """
+        self.events = events
+        self.pressed = pressed
+        self.time = perf_counter() if time is None else time
+
+
+class Controller:
+    """
+    Источник ввода игрока. Игра один раз за кадр берет у него InputSnapshot,
+    а игрок читает уже этот снимок
+    """
+
+    pressed = PressedKeys()
+
+    def read(self, game):
+        """
+        ввод следующего кадра, переопределяется в наследниках
+        :param game: игра
+        :return: объект InputSnapshot или None, если ввод кончился
+        """
+        pass
+
+    def hold(self, keys, events=()):
+        """
+        снимок для контроллеров, которые сами решают, какие кнопки зажаты:
+        для изменившихся кнопок добавляются события нажатия и отпускания
+        :param keys: кнопки, которые должны быть зажаты в этом кадре
+        :param events: дополнительные события кадра
+        :return: объект InputSnapshot
+        """
+        pressed = PressedKeys(keys)
+        events = list(events)
+        events += [pygame.event.Event(pygame.KEYUP, key=key)
+                   for key in sorted(self.pressed.keys - pressed.keys)]
+        events += [pygame.event.Event(pygame.KEYDOWN, key=key)
+                   for key in sorted(pressed.keys - self.pressed.keys)]
+        self.pressed = pressed
+        return InputSnapshot(events, pressed)
+
+
+class KeyboardController(Controller):
+    """
+    Ввод с клавиатуры
+    """
+
+    def read(self, game):
+        return InputSnapshot(pygame.event.get(), PressedKeys.from_pygame(pygame.key.get_pressed()))
+
+
+class ReplayController(Controller):
+    """
+    Ввод из записи InputRecorder
+    """
+
+    def __init__(self, replay):
+        """
+        :param replay: объект InputReplay
+        """
+        self.replay = replay
+
+    def read(self, game):
+        frame = self.replay.next_frame()
+        if frame is None:
+            return None
+        events, pressed, game.dt, level = frame
+        game.pacer.set_level(level)
+        return InputSnapshot(events, pressed)
+
+
+class LatencyTracker:
+    """
+    Замер задержки от нажатия кнопки до кадра, в котором ее результат показан на экране
+    """
+
+    def __init__(self, samples=1000):
+        """
+        :param samples: сколько последних замеров хранить
+        """
+        self.pending = {}
+        self.applied = []
+        self.samples = deque(maxlen=samples)
+
+    def on_input(self, snapshot):
+        """
+        запоминание нажатий кадра
+        :param snapshot: объект InputSnapshot
+        """
+        for event in snapshot.events:
+            if event.type == pygame.KEYDOWN and event.key in INPUT_KEYS:
+                self.pending[event.key] = snapshot.time
+            elif event.type == pygame.KEYUP:
+                self.pending.pop(event.key, None)
+
+    def effect(self, key):
+        """
+        нажатие кнопки изменило состояние игры в этом кадре
+        :param key: кнопка
+        """
+        pressed_time = self.pending.pop(key, None)
+        if pressed_time is not None:
+            self.applied.append(pressed_time)
+
+    def presented(self):
+        """
+        кадр показан на экране, задержки примененных нажатий записываются
+        """
+        now = perf_counter()
+        for pressed_time in self.applied:
+            self.samples.append(now - pressed_time)
+        self.applied.clear()
+
+    def stats(self):
+        """
+        статистика задержек в мс
+        :return: словарь с количеством, средним, 95 перцентилем и максимумом
+        """
+        if not self.samples:
+            return {'count': 0}
+        samples = sorted(self.samples)
+        return {'count': len(samples),
+                'mean': sum(samples) / len(samples) * 1000,
+                'p95': samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+                'max': samples[-1] * 1000}
@@ -2,12 +2,15 @@ import pygame
 
 from core import SpriteObject
 from creatures import Player
+from render import ITEMS
 
 
 class GrabAbleObject(SpriteObject):
     """
     объект который можно подобрать
     """
+    layer = ITEMS
+
     def __init__(self, image_path, coords, size=None, disappearance_speed=0.01):
         SpriteObject.__init__(self, image_path, coords, size)
         self.mask_rect = self.rect
@@ -24,13 +27,13 @@ class GrabAbleObject(SpriteObject):
         :param game: игра
         """
         SpriteObject.update(self, game)
-        if pygame.sprite.collide_mask(self, game.player):
+        if game.contacts.collide(self, game.player):
             self.grab(game)
         self.disappearance_timer -= self.disappearance_speed
         if 0 < self.disappearance_timer <= 2:
             self.blink()
         elif self.disappearance_timer < 0:
-            self.disappear()
+            self.disappear(game)
 
     def blink(self):
         """
@@ -56,11 +59,12 @@ class GrabAbleObject(SpriteObject):
         """
         pass
 
-    def disappear(self):
+    def disappear(self, game):
         """
         исчезновение
+        :param game: игра
         """
-        self.kill()
+        game.entities.destroy(self)
 
     def on_collision(self, collided_sprite, game):
         """
@@ -84,7 +88,7 @@ class HalfHeart(GrabAbleObject):
         :param game: игра
         """
         game.player.heal(1)
-        self.disappear()
+        self.disappear(game)
 
 
 class FullHeart(GrabAbleObject):
@@ -99,4 +103,4 @@ class FullHeart(GrabAbleObject):
         :param game: игра
         """
         game.player.heal(2)
-        self.disappear()
+        self.disappear(game)
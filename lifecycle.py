@@ -0,0 +1,124 @@
+from collections import Counter, defaultdict
+from weakref import WeakSet
+
+import pygame
+
+
+def owned_resources(entity, is_tracked=lambda obj: False):
+    """
+    поиск поверхностей и масок, которыми владеет сущность, включая вложенные спрайты
+    (части тела, взрыв), но не другие отслеживаемые сущности
+    :param entity: сущность
+    :param is_tracked: проверка, является ли объект отдельной отслеживаемой сущностью
+    :return: словарь id объекта -> поверхность или маска
+    """
+    resources = {}
+    visited = set()
+    stack = [entity]
+    while stack:
+        item = stack.pop()
+        if id(item) in visited:
+            continue
+        visited.add(id(item))
+        if isinstance(item, (pygame.Surface, pygame.mask.Mask)):
+            resources[id(item)] = item
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        elif isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, pygame.sprite.Sprite) and (item is entity or not is_tracked(item)):
+            stack.extend(vars(item).values())
+    return resources
+
+
+def owned_surfaces(entity, is_tracked=lambda obj: False):
+    """
+    поверхности, которыми владеет сущность
+    :param entity: сущность
+    :param is_tracked: проверка, является ли объект отдельной отслеживаемой сущностью
+    :return: словарь id поверхности -> поверхность
+    """
+    return {key: item for key, item in owned_resources(entity, is_tracked).items()
+            if isinstance(item, pygame.Surface)}
+
+
+class EntityManager:
+    """
+    Создание и уничтожение игровых сущностей. Живые сущности хранятся в слабых множествах,
+    поэтому менеджер не продлевает им жизнь и по нему видно, что где-то осталась лишняя ссылка
+    """
+
+    def __init__(self):
+        self.live = defaultdict(WeakSet)
+        self.created = Counter()
+        self.destroyed = Counter()
+        self.destroyed_live = WeakSet()
+
+    def create(self, entity_class, *args, groups=(), **kwargs):
+        """
+        создание сущности
+        :param entity_class: класс сущности
+        :param args: аргументы конструктора
+        :param groups: группы, в которые нужно добавить сущность
+        :param kwargs: именованные аргументы конструктора
+        :return: созданная сущность
+        """
+        entity = entity_class(*args, **kwargs)
+        self.track(entity)
+        for group in groups:
+            group.add(entity)
+        return entity
+
+    def track(self, entity):
+        """
+        начать отслеживание сущности, созданной в обход create
+        :param entity: сущность
+        """
+        name = type(entity).__name__
+        self.live[name].add(entity)
+        self.created[name] += 1
+
+    def is_tracked(self, entity):
+        """
+        :param entity: объект
+        :return: bool, отслеживается ли объект менеджером
+        """
+        return entity in self.live.get(type(entity).__name__, ())
+
+    def destroy(self, entity):
+        """
+        уничтожение сущности: удаление из всех групп. Из live она пропадет сама, когда
+        на нее не останется ссылок
+        :param entity: сущность
+        """
+        if entity.alive():
+            self.destroyed[type(entity).__name__] += 1
+            self.destroyed_live.add(entity)
+        pygame.sprite.Sprite.kill(entity)
+
+    def counts(self):
+        """
+        количество живых сущностей по типам
+        :return: словарь тип -> количество
+        """
+        return {name: len(entities) for name, entities in self.live.items() if entities}
+
+    def leaked_counts(self):
+        """
+        сколько уничтоженных сущностей каждого типа еще достижимо, значения больше нуля
+        означают, что уничтоженные сущности кто-то держит. Сущности, брошенные без destroy
+        вместе со старой комнатой, сюда не попадают
+        :return: словарь тип -> количество
+        """
+        return dict(Counter(type(entity).__name__ for entity in list(self.destroyed_live)))
+
+    def surface_counts(self):
+        """
+        количество поверхностей, которыми владеют живые сущности, по типам
+        :return: словарь тип -> количество
+        """
+        counts = Counter()
+        for name, entities in self.live.items():
+            for entity in list(entities):
+                counts[name] += len(owned_surfaces(entity, self.is_tracked))
+        return dict(counts)
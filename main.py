@@ -1,17 +1,38 @@
+from argparse import ArgumentParser, ArgumentTypeError
+from random import Random
 from time import time
-from core import Game
+from core import BACKENDS, Game, SCALE_FILTERS
 from uis import RoomsCounterText
 
 
 class MyGame(Game):
-    def __init__(self):
+    def __init__(self, seed=None, stress=None, **game_options):
+        """
+        :param seed: сид игры, от него зависят все комнаты и поведение врагов
+        :param stress: объект StressConfig для нагрузочного режима или None
+        :param game_options: параметры Game
+        """
+        from lifecycle import EntityManager
+        self.rooms_seeds_dict = {}
+        self.rooms_cleared = {}
+        self.start_time = time()
+        self.seed = seed if seed is not None else int(self.start_time * 1000 % 1000000)
+        self.random = Random(self.seed)
+        self.entities = EntityManager()
+        self.stress = stress
+        Game.__init__(self, **game_options)
+
+    def setup(self):
+        """
+        создание игрока, интерфейса и первой комнаты
+        """
         from creatures import Player
-        from core import Game, SpriteGroup, load_image
+        from core import SpriteGroup, load_image
         from uis import HealthBar
         from room import Room
-        self.rooms_seeds_dict = {}
-        self.start_time = time()
-        self.player = Player((460, 230))
+        self.player = self.entities.create(Player, (460, 230), self)
+        if self.stress is not None:
+            self.stress.apply_to_player(self.player)
         self.gameover = False
 
         # door_cords (450, 25), (80, 210), (450, 455), (820, 210)
@@ -25,9 +46,121 @@ class MyGame(Game):
         self.background = load_image('assets/room/room-background.png')
         self.create_new_room((0, 0), 'any')
 
-        Game.__init__(self)
+
+def parse_size(value):
+    """
+    разбор размера окна вида 1920x1080
+    :param value: строка
+    :return: кортеж (ширина, высота)
+    """
+    try:
+        width, height = map(int, value.lower().split('x'))
+    except ValueError:
+        raise ArgumentTypeError(f'размер должен быть вида 1920x1080: {value}')
+    return width, height
+
+
+def parse_stress(value):
+    """
+    разбор настроек нагрузочного режима
+    :param value: строка
+    :return: объект StressConfig
+    """
+    from stress import StressConfig
+    try:
+        return StressConfig.parse(value)
+    except ValueError as error:
+        raise ArgumentTypeError(str(error))
+
+
+def parse_args():
+    parser = ArgumentParser(description='Esaac')
+    parser.add_argument('--seed', type=int, help='сид игры')
+    parser.add_argument('--record', metavar='PATH', help='записать ввод и сиды комнат в файл')
+    parser.add_argument('--replay', metavar='PATH', help='воспроизвести записанный ввод')
+    parser.add_argument('--load', metavar='PATH', help='начать с сохранения')
+    parser.add_argument('--headless', action='store_true',
+                        help='запуск без окна и без ограничения fps')
+    parser.add_argument('--bot', action='store_true', help='игроком управляет бот')
+    parser.add_argument('--stress', metavar='OPTIONS', type=parse_stress,
+                        help='нагрузочный режим, например blobs=100,mosquitoes=100,rocks=0.3,'
+                             'volley=3,fire_rate=100')
+    parser.add_argument('--memory', metavar='FRAMES', type=int,
+                        help='следить за памятью: отчет каждые FRAMES кадров (0 - только '
+                             'проверка роста при смене комнат), F8 - отчет в любой момент')
+    parser.add_argument('--window', metavar='WxH', type=parse_size,
+                        help='размер окна, кадр масштабируется в него')
+    parser.add_argument('--fullscreen', action='store_true', help='полноэкранный режим')
+    parser.add_argument('--scale-filter', choices=sorted(SCALE_FILTERS), default='nearest',
+                        help='фильтр масштабирования кадра')
+    parser.add_argument('--half-res', action='store_true',
+                        help='рисовать кадр в половинном разрешении и растягивать в окно, '
+                             'для слабых машин (только --renderer software)')
+    parser.add_argument('--renderer', choices=BACKENDS, default='software',
+                        help='software - Surface.blit, texture - текстуры SDL_Renderer '
+                             '(при ошибке используется software)')
+    parser.add_argument('--frame-stats', action='store_true',
+                        help='вывести гистограмму времени кадров и уровни деградации после выхода')
+    parser.add_argument('--metrics', action='store_true',
+                        help='вывести среднее за кадр по счетчикам горячих операций после выхода')
+    parser.add_argument('--latency', action='store_true',
+                        help='вывести задержку от нажатия до показа кадра после выхода')
+    parser.add_argument('--trace', metavar='PATH',
+                        help='записать трассу фаз кадра и update/render объектов '
+                             'в формате Chrome trace (chrome://tracing, ui.perfetto.dev)')
+    return parser.parse_args()
 
 
 if __name__ == '__main__':
-    game = MyGame
-    game().run()
+    from replay import InputRecorder, InputReplay
+    args = parse_args()
+    game_options = {'headless': args.headless, 'stress': args.stress,
+                    'window_size': args.window, 'fullscreen': args.fullscreen,
+                    'scale_filter': args.scale_filter, 'backend': args.renderer,
+                    'render_scale': 0.5 if args.half_res else 1}
+    seed = args.seed
+    if args.replay:
+        replay = InputReplay(args.replay)
+        seed = replay.seed
+        game_options['replay'] = replay
+    if seed is None:
+        seed = int(time() * 1000 % 1000000)
+    if args.bot:
+        from bot import BotController
+        game_options['controller'] = BotController(seed)
+    if args.record:
+        game_options['recorder'] = InputRecorder(args.record, seed)
+    game = MyGame(seed, **game_options)
+    if args.memory is not None:
+        from memory import MemoryMonitor
+        game.memory = MemoryMonitor(args.memory)
+    if args.trace:
+        from tracing import ChromeTracer
+        game.tracer = ChromeTracer(args.trace)
+        game.tracer.install(game)
+    if args.load:
+        from saves import load_game
+        load_game(game, args.load)
+    game.run()
+    if args.replay:
+        print(f'Воспроизведено кадров: {replay.index}, '
+              f'комнаты совпали: {replay.check(game)}')
+    if args.frame_stats:
+        stats = game.pacer.stats()
+        print(f"Кадров: {stats['frames']}, время кадра, мс: 50% до {stats['p50']}, "
+              f"95% до {stats['p95']}, 99% до {stats['p99']}")
+        print(f"Кадров на уровнях деградации: {stats['frames_at_level']}, "
+              f"смен уровня: {stats['level_changes']}")
+    if args.metrics:
+        print(f'Счетчики в среднем за кадр (последние {len(game.metrics.history)} кадров):')
+        for name, value in game.metrics.average().items():
+            print(f'    {name}: {value:.1f}')
+        print(f'Проверки масок из кэша пар: {game.contacts.hit_rate():.0%}')
+    if args.latency:
+        stats = game.latency.stats()
+        if stats['count']:
+            print(f"Задержка ввода, мс: среднее {stats['mean']:.1f}, "
+                  f"95% {stats['p95']:.1f}, максимум {stats['max']:.1f} "
+                  f"(нажатий: {stats['count']})")
+        else:
+            print('Задержка ввода: нажатий не было')
@@ -0,0 +1,164 @@
+import gc
+import tracemalloc
+
+import pygame
+
+import assets
+import core
+from lifecycle import owned_resources
+
+
+def surface_bytes(surface):
+    """
+    :param surface: поверхность
+    :return: размер пикселей в байтах, у подповерхности 0 - пиксели принадлежат родителю
+    """
+    if surface.get_parent() is not None:
+        return 0
+    return surface.get_pitch() * surface.get_height()
+
+
+def mask_bytes(mask):
+    """
+    :param mask: маска
+    :return: примерный размер маски в байтах, биты хранятся 64-битными словами по строкам
+    """
+    width, height = mask.get_size()
+    return (width + 63) // 64 * 8 * height
+
+
+def cached_surfaces():
+    """
+    поверхности общих кэшей: изображения, кадры спрайт-листов и силуэты
+    :return: словарь id -> поверхность, подповерхности заменены родителями
+    """
+    surfaces = list(assets.image_cache.values())
+    for frames in core._sheet_frames.values():
+        surfaces.extend(frames)
+    for silhouettes in list(core._silhouettes.values()):
+        surfaces.extend(silhouettes.values())
+    result = {}
+    for surface in surfaces:
+        while surface.get_parent() is not None:
+            surface = surface.get_parent()
+        result[id(surface)] = surface
+    return result
+
+
+def memory_report(game):
+    """
+    память по типам сущностей: собственные поверхности и маски живых сущностей, общие кэши
+    и выделения python, если включен tracemalloc
+    :param game: игра
+    :return: словарь с отчетом
+    """
+    cache = cached_surfaces()
+    seen = set(cache)
+    types = {}
+    for name, entities in game.entities.live.items():
+        entities = list(entities)
+        if not entities:
+            continue
+        row = types[name] = {'count': len(entities), 'surfaces': 0, 'surface_bytes': 0,
+                             'masks': 0, 'mask_bytes': 0}
+        for entity in entities:
+            for key, resource in owned_resources(entity, game.entities.is_tracked).items():
+                if key in seen:
+                    continue
+                seen.add(key)
+                if isinstance(resource, pygame.Surface):
+                    parent = resource
+                    while parent.get_parent() is not None:
+                        parent = parent.get_parent()
+                    if id(parent) in cache:
+                        # кадр из общего кэша
+                        continue
+                    row['surfaces'] += 1
+                    row['surface_bytes'] += surface_bytes(resource)
+                else:
+                    row['masks'] += 1
+                    row['mask_bytes'] += mask_bytes(resource)
+    cache_bytes = sum(surface_bytes(surface) for surface in cache.values())
+    return {
+        'types': types,
+        'cache_surfaces': len(cache),
+        'cache_bytes': cache_bytes,
+        'python_bytes': tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None,
+        'total_bytes': cache_bytes + sum(row['surface_bytes'] + row['mask_bytes']
+                                         for row in types.values()),
+    }
+
+
+def format_report(report):
+    """
+    :param report: отчет memory_report
+    :return: отчет в виде таблицы
+    """
+    lines = [f'{"тип":<16} {"штук":>6} {"поверхн.":>9} {"КБ":>9} {"маски":>6} {"КБ":>8}']
+    for name, row in sorted(report['types'].items(),
+                            key=lambda item: -item[1]['surface_bytes'] - item[1]['mask_bytes']):
+        lines.append(f'{name:<16} {row["count"]:>6} {row["surfaces"]:>9} '
+                     f'{row["surface_bytes"] / 1024:>9.1f} {row["masks"]:>6} '
+                     f'{row["mask_bytes"] / 1024:>8.1f}')
+    lines.append(f'общие кэши: {report["cache_surfaces"]} поверхностей, '
+                 f'{report["cache_bytes"] / 1024:.1f} КБ; всего в pygame: '
+                 f'{report["total_bytes"] / 1024:.1f} КБ')
+    if report['python_bytes'] is not None:
+        lines.append(f'python (tracemalloc): {report["python_bytes"] / 1024:.1f} КБ')
+    return '\n'.join(lines)
+
+
+class MemoryMonitor:
+    """
+    Периодический отчет о памяти и проверка роста между сменами комнат: после сборки мусора
+    сравниваются выделения python по tracemalloc и сущности, которые уже уничтожены,
+    но еще достижимы
+    """
+
+    def __init__(self, interval=0, growth_limit=512 * 1024, top=5):
+        """
+        :param interval: через сколько кадров печатать отчет, 0 - не печатать
+        :param growth_limit: рост выделений python между сменами комнат в байтах,
+            после которого он отмечается
+        :param top: сколько строк кода с наибольшим ростом показывать
+        """
+        self.interval = interval
+        self.growth_limit = growth_limit
+        self.top = top
+        self.frames = 0
+        self.previous = None
+        self.snapshot = None
+        self.flags = []
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def on_frame(self, game):
+        """
+        вызывается в конце каждого кадра
+        :param game: игра
+        """
+        self.frames += 1
+        if self.interval and self.frames % self.interval == 0:
+            print(f'память, кадр {self.frames}:')
+            print(format_report(memory_report(game)))
+
+    def on_room_change(self, game):
+        """
+        вызывается после смены комнаты, сравнивает память с прошлой сменой
+        :param game: игра
+        """
+        gc.collect()
+        report = memory_report(game)
+        snapshot = tracemalloc.take_snapshot()
+        leaked = game.entities.leaked_counts()
+        if self.previous is not None:
+            growth = report['python_bytes'] - self.previous['python_bytes']
+            if growth > self.growth_limit or leaked:
+                self.flags.append({'frame': self.frames, 'room': game.room.coords,
+                                   'python_growth': growth, 'leaked': leaked})
+                print(f'рост памяти при переходе в комнату {game.room.coords}: '
+                      f'python +{growth / 1024:.1f} КБ, недоуничтоженные сущности: {leaked}')
+                for stat in snapshot.compare_to(self.snapshot, 'lineno')[:self.top]:
+                    print(f'    {stat}')
+        self.previous = report
+        self.snapshot = snapshot
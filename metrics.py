@@ -0,0 +1,76 @@
+from collections import Counter, deque
+
+# накопительные счетчики горячих операций, увеличиваются прямо в коде игры
+counters = Counter()
+# группы игры, размеры которых записываются в снимок кадра
+GROUPS = ('room', 'physical_group', 'items', 'ammos', 'creatures', 'player_group')
+
+
+class BlitCounter:
+    """
+    Обертка над экраном, которая считает blit и blits, остальное передает экрану как есть
+    """
+
+    def __init__(self, surface):
+        """
+        :param surface: экран
+        """
+        self.surface = surface
+
+    def blit(self, source, dest, area=None, special_flags=0):
+        counters['blit'] += 1
+        return self.surface.blit(source, dest, area, special_flags)
+
+    def blits(self, blit_sequence, doreturn=1):
+        blit_sequence = list(blit_sequence)
+        counters['blit'] += len(blit_sequence)
+        return self.surface.blits(blit_sequence, doreturn)
+
+    def __getattr__(self, name):
+        return getattr(self.surface, name)
+
+
+class FrameMetrics:
+    """
+    Покадровые снимки счетчиков: сколько раз каждая операция выполнилась за кадр
+    и сколько сущностей было в каждой группе
+    """
+
+    def __init__(self, history=600):
+        """
+        :param history: сколько последних кадров хранить
+        """
+        self.history = deque(maxlen=history)
+        self.previous = Counter()
+
+    def end_frame(self, game):
+        """
+        снимок кадра, вызывается в конце каждого кадра
+        :param game: игра
+        :return: словарь счетчик -> значение за кадр
+        """
+        previous = self.previous
+        frame = {name: value - previous[name] for name, value in counters.items()
+                 if value != previous[name]}
+        for name in GROUPS:
+            group = getattr(game, name, None)
+            if group is not None:
+                frame[f'entities.{name}'] = len(group)
+        self.previous = counters.copy()
+        self.history.append(frame)
+        return frame
+
+    def last(self):
+        """
+        :return: снимок последнего кадра
+        """
+        return self.history[-1] if self.history else {}
+
+    def average(self):
+        """
+        :return: среднее значение каждого счетчика за кадр по сохраненным кадрам
+        """
+        totals = Counter()
+        for frame in self.history:
+            totals.update(frame)
+        return {name: value / len(self.history) for name, value in sorted(totals.items())}
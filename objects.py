@@ -1,49 +1,99 @@
+import effects
+from animation import FRAME_MS
+from assets import list_frames
+from collision import sweep_segment
+from metrics import counters
+from render import PROJECTILES
 from core import *
 from creatures import *
 
 
-class Explosion(AnimatedSprite):
+class Explosion:
     """
-    класс взрыва
+    взрыв объекта: анимация живет в пуле эффектов игры game.effects, здесь только связь
+    с родителем - когда его спрятать и когда уничтожить
     """
+    path = 'assets/explosion'
+    color_key = (68, 36, 52)
 
-    def __init__(self, parent, coords, offset, size, animation_speed=1):
-        explosion_animation = {
-            'explosion': [f'assets/explosion/{file_name}' for file_name in
-                          os.listdir('assets/explosion')],
-            'wait': [f'assets/explosion/{os.listdir("assets/explosion")[0]}']}
-        AnimatedSprite.__init__(self, explosion_animation, coords, size, 'wait', animation_speed,
-                                (68, 36, 52))
+    def __init__(self, parent, game, coords, offset, size, frame_time=4 * FRAME_MS):
+        """
+        :param parent: взрывающийся объект
+        :param game: игра, в пуле эффектов которой живет анимация
+        :param coords: координаты
+        :param offset: смещение взрыва относительно родителя
+        :param size: размер
+        :param frame_time: длительность кадра в мс
+        """
         self.parent = parent
         self.offset = offset
+        self.frame_time = frame_time
+        self.sheet = effects.sheet((self.path, size), lambda: self.load_frames(size))
+        self.length = len(effects.sheets[self.sheet])
+        self.effects = game.effects
+        self.effect = None
+
+    def load_frames(self, size):
+        """
+        :param size: размер
+        :return: кадры взрыва
+        """
+        frames = [load_image(path, size or None) for path in list_frames(self.path)]
+        for frame in frames:
+            frame.set_colorkey(self.color_key)
+        return frames
+
+    def position(self):
+        """
+        :return: координаты взрыва относительно родителя
+        """
+        return self.parent.rect.x - self.offset[0], self.parent.rect.y - self.offset[1]
 
     def explode(self):
         """
-        взрыв
+        взрыв, повторные вызовы только передвигают его за родителем
         """
-        self.start('explosion')
         self.parent.is_killed = True
         self.parent.is_invisible = True
+        if self.effect is None:
+            self.effect = self.effects.spawn(self.sheet, self.position(), self.frame_time)
+        else:
+            self.effects.move(self.effect, self.position())
 
-    def update(self, game):
+    def reset(self):
         """
-        обновление
-        :param game: игра
+        остановка взрыва, нужно при возвращении родителя к жизни
         """
-        AnimatedSprite.update(self, game)
-        if self.index >= 4:
-            self.parent.image.set_alpha(0)
-        if self.index == 7:
-            pygame.sprite.Sprite.kill(self.parent)
-            pygame.sprite.Sprite.kill(self)
+        if self.effect is not None:
+            self.effects.stop(self.effect)
+        self.effect = None
 
-    def render(self, screen):
+    @property
+    def index(self):
         """
-        рендер
-        :param screen: экран
+        :return: кадр взрыва, 0 до взрыва и последний кадр после его окончания
+        """
+        if self.effect is None:
+            return 0
+        frame = self.effects.frame_of(self.effect)
+        return self.length - 1 if frame is None else frame
+
+    def update(self, game):
         """
-        screen.blit(self.image, (self.parent.rect.x - self.offset[0], self.parent.rect.y -
-                                 self.offset[1]))
+        обновление: кадры продвигает пул, здесь родитель прячется и уничтожается
+        :param game: игра
+        """
+        if self.effect is None:
+            return
+        self.effects.move(self.effect, self.position())
+        index = self.index
+        if index >= 4 and self.parent.image.get_alpha() != 0:
+            # изображения из кэша общие для всех объектов, поэтому прячем копию
+            self.parent.image = self.parent.image.copy()
+            counters['surface.new'] += 1
+            self.parent.image.set_alpha(0)
+        if index == 7:
+            game.entities.destroy(self.parent)
 
 
 class PlayerBodyParts(AnimatedSprite):
@@ -51,19 +101,17 @@ class PlayerBodyParts(AnimatedSprite):
     класс частей тела персонажа
     """
 
-    def __init__(self, images_paths, coords, parent, animation_speed: float = 1):
-        AnimatedSprite.__init__(self, images_paths, coords)
+    def __init__(self, images_paths, coords, parent, clock, frame_time: float = FRAME_MS):
+        AnimatedSprite.__init__(self, images_paths, coords, clock, frame_time=frame_time)
 
         self.parent = parent
 
         self.right_sprites = self.action_sprites
         self.left_sprites = dict()
-        self.animation_speed = animation_speed * 0.1
 
-        for action, images in self.action_sprites.items():
-            rotated_images = [pygame.transform.flip(i, True, False) for i in
-                              self.action_sprites[action]]
-            self.left_sprites[action] = rotated_images
+        for action, paths in self.images_paths.items():
+            self.left_sprites[action] = [load_image(path, self.size or None, flip=True)
+                                         for path in paths]
 
     def start(self, action='idle'):
         """
@@ -93,6 +141,7 @@ class Tears(SpriteObject, PhysicalCreature, CanHurtObject):
     """
     класс слез
     """
+    layer = PROJECTILES
 
     def __init__(self, coords, team, game, direction_x=None, direction_y=None, ammo_speed=5,
                  dx=None, dy=None):
@@ -121,7 +170,7 @@ class Tears(SpriteObject, PhysicalCreature, CanHurtObject):
 
         game.ammos.add(self)
         self.game = game
-        self.explosion = Explosion(self, self.coords, (self.image.get_width() / 2 + 15,
+        self.explosion = Explosion(self, game, self.coords, (self.image.get_width() / 2 + 15,
                                                        self.image.get_height() / 2 + 10), 0.3)
         self.is_killed = False
         self.hit_box = self.rect
@@ -141,8 +190,42 @@ class Tears(SpriteObject, PhysicalCreature, CanHurtObject):
         if (abs(self.start_coords[0] - self.coords[0]) > 400
            or abs(self.start_coords[1] - self.coords[1]) > 400):
             self.explosion.explode()
-        self.coords = int(self.coords[0] + self.speed_x), int(self.coords[1] + self.speed_y)
+        target = int(self.coords[0] + self.speed_x), int(self.coords[1] + self.speed_y)
+        delta = target[0] - self.rect.x, target[1] - self.rect.y
+        hit = self.sweep(delta) if delta != (0, 0) else None
+        if hit is not None:
+            obstacle, fraction = hit
+            target = self.rect.x + int(delta[0] * fraction), self.rect.y + int(delta[1] * fraction)
+        self.coords = target
         self.rect.x, self.rect.y = self.coords[0], self.coords[1]
+        if hit is not None:
+            if isinstance(obstacle, PhysicalCreature):
+                self.on_collision_with_physical_creature(obstacle)
+            else:
+                self.on_collision(obstacle, self.game)
+
+    def sweep(self, delta):
+        """
+        проверка пути за кадр: быстрая слеза не должна проскакивать насквозь стены, камни
+        и существ другой команды
+        :param delta: сдвиг за кадр
+        :return: (препятствие, доля пути до него) или None, если на пути ничего нет или
+            столкновение в конце пути найдет обычная проверка
+        """
+        room = self.game.room
+        creatures = [sprite for sprite in (*room.enemy_group, self.game.player)
+                     if sprite.team != self.team]
+        obstacles = room.solids + creatures
+        rects = room.solid_rects + [sprite.mask_rect for sprite in creatures]
+        hit = sweep_segment(self.rect.center, delta, rects)
+        if hit is None:
+            return None
+        fraction, index = hit
+        if self.rect.move(delta).colliderect(rects[index]):
+            # на месте назначения столкновение найдет обычная проверка
+            return None
+        counters['tears.swept_hit'] += 1
+        return obstacles[index], fraction
 
     def update(self, game):
         """
@@ -162,7 +245,6 @@ class Tears(SpriteObject, PhysicalCreature, CanHurtObject):
         screen.blit(self.image, self.rect)
         if self.is_killed:
             self.explosion.explode()
-            self.explosion.render(screen)
 
     def on_collision(self, collided_sprite, game):
         """
@@ -197,6 +279,7 @@ class Rock(SpriteObject, PhysicalObject, CantHurtObject):
     """
     класс камня
     """
+    static = True
 
     def __init__(self, coords):
         SpriteObject.__init__(self, image_path='assets/room/room_rock.png',
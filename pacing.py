@@ -0,0 +1,87 @@
+from collections import Counter, deque
+
+# уровни деградации, каждый следующий включает предыдущие
+SKIP_HURT_OVERLAYS = 1
+DROP_EXPLOSION_FRAMES = 2
+REDUCE_AI_TICK = 3
+MAX_LEVEL = REDUCE_AI_TICK
+
+
+class FramePacer:
+    """
+    Гистограмма времени кадров и ступенчатое отключение необязательной работы,
+    когда кадры не укладываются в бюджет
+    """
+
+    def __init__(self, fps, bucket_ms=2, buckets=25, window=30, headroom=0.7):
+        """
+        :param fps: целевая частота кадров, 0 - без бюджета и без деградации
+        :param bucket_ms: ширина столбца гистограммы в мс
+        :param buckets: количество столбцов, последний собирает все более долгие кадры
+        :param window: за сколько кадров усредняется время перед сменой уровня
+        :param headroom: доля бюджета, ниже которой уровень понижается обратно
+        """
+        self.budget = 1000 / fps if fps else None
+        self.bucket_ms = bucket_ms
+        self.histogram = [0] * buckets
+        self.recent = deque(maxlen=window)
+        self.headroom = headroom
+        self.level = 0
+        self.frames_at_level = Counter()
+        self.level_changes = 0
+        self.set_level(0)
+
+    def set_level(self, level):
+        """
+        смена уровня деградации
+        :param level: от 0 до MAX_LEVEL
+        """
+        if level != self.level:
+            self.level_changes += 1
+            self.recent.clear()
+        self.level = level
+
+    def record(self, frame_ms):
+        """
+        учет времени кадра без ожидания в clock.tick
+        :param frame_ms: время работы кадра в мс
+        """
+        self.histogram[min(int(frame_ms // self.bucket_ms), len(self.histogram) - 1)] += 1
+        self.frames_at_level[self.level] += 1
+        self.recent.append(frame_ms)
+        if self.budget is None or len(self.recent) < self.recent.maxlen:
+            return
+        average = sum(self.recent) / len(self.recent)
+        if average > self.budget and self.level < MAX_LEVEL:
+            self.set_level(self.level + 1)
+        elif average < self.budget * self.headroom and self.level > 0:
+            self.set_level(self.level - 1)
+
+    def percentile(self, percent):
+        """
+        перцентиль времени кадра по гистограмме
+        :param percent: от 0 до 100
+        :return: верхняя граница столбца в мс или None, если кадров не было
+        """
+        total = sum(self.histogram)
+        if not total:
+            return None
+        count = 0
+        for i, frames in enumerate(self.histogram):
+            count += frames
+            if count * 100 >= total * percent:
+                return (i + 1) * self.bucket_ms
+        return len(self.histogram) * self.bucket_ms
+
+    def stats(self):
+        """
+        телеметрия пейсера
+        :return: словарь с количеством кадров, перцентилями и уровнями
+        """
+        return {'frames': sum(self.histogram),
+                'p50': self.percentile(50),
+                'p95': self.percentile(95),
+                'p99': self.percentile(99),
+                'level': self.level,
+                'level_changes': self.level_changes,
+                'frames_at_level': dict(self.frames_at_level)}
@@ -0,0 +1,112 @@
+from collections import deque
+from math import sqrt
+
+NEIGHBOURS = ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (1, -1), (-1, 1), (1, 1))
+
+
+class FlowField:
+    """
+    Поле направлений к игроку, общее для всех врагов комнаты.
+    Пересчитывается одним обходом в ширину только когда игрок переходит в другую клетку,
+    враги берут из него направление за O(1)
+    """
+
+    def __init__(self, obstacles, size=(959, 540), cell_size=20, clearance=15):
+        """
+        :param obstacles: список rect препятствий (стены и камни)
+        :param size: размер поля в пикселях
+        :param cell_size: размер клетки сетки
+        :param clearance: отступ от препятствий, чтобы враги не цеплялись за них краем
+        """
+        self.cell_size = cell_size
+        self.columns = size[0] // cell_size + 1
+        self.rows = size[1] // cell_size + 1
+        self.blocked = [False] * (self.columns * self.rows)
+        self.directions = [(0, 0)] * (self.columns * self.rows)
+        self.target_cell = None
+        for rect in obstacles:
+            self.block(rect.inflate(clearance * 2, clearance * 2))
+
+    def block(self, rect):
+        """
+        пометить клетки, которые пересекает rect, как непроходимые
+        :param rect: объект rect препятствия
+        """
+        left = max(rect.left // self.cell_size, 0)
+        right = min((rect.right - 1) // self.cell_size, self.columns - 1)
+        top = max(rect.top // self.cell_size, 0)
+        bottom = min((rect.bottom - 1) // self.cell_size, self.rows - 1)
+        for row in range(top, bottom + 1):
+            for column in range(left, right + 1):
+                self.blocked[row * self.columns + column] = True
+
+    def cell_at(self, x, y):
+        """
+        индекс клетки по координатам
+        :param x: х координата
+        :param y: у координата
+        :return: индекс клетки
+        """
+        column = min(max(int(x) // self.cell_size, 0), self.columns - 1)
+        row = min(max(int(y) // self.cell_size, 0), self.rows - 1)
+        return row * self.columns + column
+
+    def update(self, target):
+        """
+        пересчет поля, если цель перешла в другую клетку
+        :param target: координаты цели
+        :return: bool, было ли поле пересчитано
+        """
+        cell = self.cell_at(*target)
+        if cell == self.target_cell:
+            return False
+        self.build(cell)
+        return True
+
+    def build(self, target_cell):
+        """
+        обход в ширину от клетки цели, каждая достигнутая клетка указывает на соседа,
+        из которого в нее пришли
+        :param target_cell: индекс клетки цели
+        """
+        columns = self.columns
+        rows = self.rows
+        blocked = self.blocked
+        diagonal = 1 / sqrt(2)
+        directions = [(0, 0)] * (columns * rows)
+        visited = [False] * (columns * rows)
+        visited[target_cell] = True
+        queue = deque((target_cell,))
+        while queue:
+            cell = queue.popleft()
+            row, column = divmod(cell, columns)
+            for dx, dy in NEIGHBOURS:
+                next_column = column + dx
+                next_row = row + dy
+                if not (0 <= next_column < columns and 0 <= next_row < rows):
+                    continue
+                next_cell = next_row * columns + next_column
+                if visited[next_cell] or blocked[next_cell]:
+                    continue
+                if dx and dy and (blocked[row * columns + next_column] or
+                                  blocked[next_row * columns + column]):
+                    # не срезаем углы препятствий по диагонали
+                    continue
+                visited[next_cell] = True
+                if dx and dy:
+                    directions[next_cell] = (-dx * diagonal, -dy * diagonal)
+                else:
+                    directions[next_cell] = (-dx, -dy)
+                queue.append(next_cell)
+        self.directions = directions
+        self.target_cell = target_cell
+
+    def direction(self, x, y):
+        """
+        направление движения к цели из данной точки
+        :param x: х координата
+        :param y: у координата
+        :return: единичный вектор (dx, dy) или (0, 0), если клетка недостижима
+            или совпадает с клеткой цели
+        """
+        return self.directions[self.cell_at(x, y)]
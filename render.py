@@ -0,0 +1,240 @@
+import os
+from operator import itemgetter
+from weakref import WeakKeyDictionary, WeakSet
+
+import pygame
+
+from metrics import counters
+
+# слои отрисовки снизу вверх
+BACKGROUND = 0
+STATIC = 1
+ITEMS = 2
+CREATURES = 3
+PROJECTILES = 4
+EFFECTS = 5
+HUD = 6
+
+_by_layer = itemgetter(0)
+# поверхности, которые меняются на месте после создания: их текстуры загружаются заново
+# при каждой отрисовке
+dynamic_surfaces = WeakSet()
+
+
+class RenderQueue:
+    """
+    Очередь отрисовки кадра: объекты рисуют в нее как в экран, а в конце кадра все
+    отсортированное по слоям передается экрану одним вызовом Surface.blits. Внутри слоя
+    сохраняется порядок добавления
+    """
+
+    def __init__(self):
+        self.items = []
+        self.layer = CREATURES
+
+    def blit(self, source, dest, area=None, special_flags=0):
+        """
+        добавление в текущий слой, аргументы как у Surface.blit
+        """
+        self.items.append((self.layer, source, dest, area, special_flags))
+
+    def blits(self, blit_sequence, doreturn=1):
+        """
+        добавление нескольких поверхностей в текущий слой, аргументы как у Surface.blits
+        """
+        for item in blit_sequence:
+            self.blit(*item)
+
+    def add(self, layer, source, dest, area=None, special_flags=0):
+        """
+        добавление в заданный слой
+        :param layer: слой
+        :param source: поверхность
+        :param dest: координаты или прямоугольник
+        :param area: часть поверхности
+        :param special_flags: флаги смешивания
+        """
+        self.items.append((layer, source, dest, area, special_flags))
+
+    def drain(self):
+        """
+        :return: содержимое очереди, отсортированное по слоям, очередь очищается
+        """
+        items = self.items
+        items.sort(key=_by_layer)
+        self.items = []
+        return items
+
+    def flush(self, surface):
+        """
+        отрисовка очереди на поверхность и очистка очереди
+        :param surface: экран
+        """
+        surface.blits([item[1:] for item in self.drain()], 0)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def mark_dynamic(surface):
+    """
+    отметить поверхность как изменяемую на месте
+    :param surface: поверхность
+    :return: та же поверхность
+    """
+    dynamic_surfaces.add(surface)
+    return surface
+
+
+def blit_on_layer(screen, layer, source, dest):
+    """
+    отрисовка в заданный слой, если рисуем в очередь, иначе сразу на поверхность
+    :param screen: очередь RenderQueue или поверхность
+    :param layer: слой
+    :param source: поверхность
+    :param dest: координаты или прямоугольник
+    """
+    if isinstance(screen, RenderQueue):
+        screen.add(layer, source, dest)
+    else:
+        screen.blit(source, dest)
+
+
+class DownscaledFrame:
+    """
+    Кадр пониженного разрешения для слабых машин: очередь рисуется уменьшенными копиями
+    поверхностей по уменьшенным координатам, а при показе кадр растягивается в окно.
+    Неизменяемая поверхность уменьшается один раз, изменяемые на месте - при каждой отрисовке
+    """
+
+    def __init__(self, size, scale):
+        """
+        :param size: размер кадра в координатах игры
+        :param scale: доля разрешения, например 0.5
+        """
+        self.scale = scale
+        self.size = (round(size[0] * scale), round(size[1] * scale))
+        self.images = WeakKeyDictionary()
+
+    def image(self, surface):
+        """
+        :param surface: поверхность
+        :return: уменьшенная копия, для неизменяемых поверхностей берется из кэша
+        """
+        image = self.images.get(surface)
+        if image is None or surface in dynamic_surfaces:
+            width, height = surface.get_size()
+            image = pygame.transform.scale(surface, (max(1, round(width * self.scale)),
+                                                     max(1, round(height * self.scale))))
+            self.images[surface] = image
+            counters['surface.downscale'] += 1
+        alpha = surface.get_alpha()
+        if image.get_alpha() != alpha:
+            image.set_alpha(alpha)
+        return image
+
+    def flush(self, queue, surface):
+        """
+        отрисовка очереди на уменьшенный кадр и очистка очереди
+        :param queue: объект RenderQueue
+        :param surface: кадр размера size
+        """
+        scale = self.scale
+        blits = []
+        for layer, source, dest, area, special_flags in queue.drain():
+            if area is not None:
+                area = pygame.Rect(area)
+                area = (int(area.x * scale), int(area.y * scale),
+                        round(area.width * scale), round(area.height * scale))
+            blits.append((self.image(source), (int(dest[0] * scale), int(dest[1] * scale)),
+                          area, special_flags))
+        surface.blits(blits, 0)
+
+
+class TextureRenderer:
+    """
+    Отрисовка очереди через SDL_Renderer из pygame._sdl2: каждая поверхность один раз
+    загружается в текстуру и рисуется текстурированным прямоугольником, масштабирование
+    в окно делает SDL. Без видеокарты работает программный рендерер SDL
+    """
+
+    def __init__(self, title, size, window_size=None, fullscreen=False, scale_filter='nearest',
+                 accelerated=True):
+        """
+        :param title: заголовок окна
+        :param size: размер кадра
+        :param window_size: размер окна, по умолчанию равен кадру
+        :param fullscreen: на весь экран
+        :param scale_filter: 'nearest' или 'smooth'
+        :param accelerated: сначала попробовать аппаратный рендерер
+        :raise pygame.error: если SDL не смог создать окно или рендерер
+        """
+        from pygame._sdl2 import video
+        os.environ['SDL_RENDER_SCALE_QUALITY'] = '0' if scale_filter == 'nearest' else '1'
+        self.video = video
+        try:
+            self.window = video.Window(title, window_size or size,
+                                       resizable=window_size is not None,
+                                       fullscreen_desktop=fullscreen)
+            self.renderer = None
+            for hardware in ((1, 0) if accelerated else (0,)):
+                try:
+                    self.renderer = video.Renderer(self.window, accelerated=hardware)
+                    break
+                except RuntimeError:
+                    if not hardware:
+                        raise
+        except RuntimeError as error:
+            raise pygame.error(str(error))
+        if fullscreen or self.window.size != tuple(size):
+            # кадр масштабируется в окно с черными полосами по краям
+            self.renderer.logical_size = size
+        self.size = size
+        self.textures = WeakKeyDictionary()
+        self.renderer.draw_color = (0, 0, 0, 255)
+
+    def texture(self, surface):
+        """
+        :param surface: поверхность
+        :return: текстура поверхности, для неизменяемых поверхностей берется из кэша
+        """
+        texture = self.textures.get(surface)
+        if texture is None or surface in dynamic_surfaces:
+            texture = self.video.Texture.from_surface(self.renderer, surface)
+            self.textures[surface] = texture
+            counters['texture.upload'] += 1
+        alpha = surface.get_alpha()
+        if alpha is not None and texture.alpha != alpha:
+            texture.alpha = alpha
+        return texture
+
+    def draw(self, queue):
+        """
+        отрисовка очереди, очередь очищается
+        :param queue: объект RenderQueue
+        """
+        renderer = self.renderer
+        renderer.clear()
+        items = queue.drain()
+        counters['blit'] += len(items)
+        for layer, source, dest, area, special_flags in items:
+            texture = self.texture(source)
+            if area is None:
+                texture.draw(dstrect=(dest[0], dest[1]))
+            else:
+                area = pygame.Rect(area)
+                texture.draw(srcrect=area, dstrect=(dest[0], dest[1], area.width, area.height))
+
+    def present(self):
+        """
+        показ кадра
+        """
+        self.renderer.present()
+
+    def close(self):
+        """
+        освобождение текстур, рендерера и окна
+        """
+        self.textures.clear()
+        self.renderer = None
+        self.window.destroy()
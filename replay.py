@@ -0,0 +1,93 @@
+import json
+
+import pygame
+
+from inputs import PressedKeys
+
+RECORDED_EVENTS = (pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP)
+REPLAY_VERSION = 1
+
+
+class InputRecorder:
+    """
+    Запись покадрового ввода и сидов комнат для последующего воспроизведения
+    """
+
+    def __init__(self, path, seed):
+        """
+        :param path: путь к файлу записи
+        :param seed: сид игры
+        """
+        self.path = path
+        self.seed = seed
+        self.frames = []
+
+    def record(self, snapshot, dt, level=0):
+        """
+        запись одного кадра
+        :param snapshot: ввод кадра, объект InputSnapshot
+        :param dt: время предыдущего кадра в мс
+        :param level: уровень деградации FramePacer в этом кадре, от него зависит частота ИИ
+        """
+        self.frames.append({
+            'events': [[event.type, getattr(event, 'key', None)] for event in snapshot.events
+                       if event.type in RECORDED_EVENTS],
+            'pressed': sorted(snapshot.pressed.keys),
+            'dt': dt,
+            'level': level,
+        })
+
+    def save(self, game):
+        """
+        сохранение записи в файл
+        :param game: объект игры
+        """
+        with open(self.path, 'w') as file:
+            json.dump({
+                'version': REPLAY_VERSION,
+                'seed': self.seed,
+                'rooms_seeds': [[*coords, seed] for coords, seed in
+                                game.rooms_seeds_dict.items()],
+                'frames': self.frames,
+            }, file)
+
+
+class InputReplay:
+    """
+    Воспроизведение записанного ввода вместо клавиатуры
+    """
+
+    def __init__(self, path):
+        """
+        :param path: путь к файлу записи
+        """
+        with open(path) as file:
+            data = json.load(file)
+        if data['version'] != REPLAY_VERSION:
+            raise ValueError(f"Unsupported replay version: {data['version']}")
+        self.seed = data['seed']
+        self.rooms_seeds = {(x, y): seed for x, y, seed in data['rooms_seeds']}
+        self.frames = data['frames']
+        self.index = 0
+
+    def next_frame(self):
+        """
+        следующий кадр записи
+        :return: события, состояние зажатых кнопок, время кадра и уровень деградации
+            или None, если запись кончилась
+        """
+        if self.index >= len(self.frames):
+            return None
+        frame = self.frames[self.index]
+        self.index += 1
+        events = [pygame.event.Event(event_type, key=key) if key is not None
+                  else pygame.event.Event(event_type) for event_type, key in frame['events']]
+        return events, PressedKeys(frame['pressed']), frame['dt'], frame.get('level', 0)
+
+    def check(self, game):
+        """
+        сверка сидов комнат с записью
+        :param game: объект игры
+        :return: bool, совпал ли проход
+        """
+        return self.rooms_seeds == game.rooms_seeds_dict
@@ -2,20 +2,11 @@ from random import randint
 import random
 import pygame
 from core import SpriteObject, load_image, CantHurtObject, SpriteGroup, PhysicalObject
-from time import time
 from objects import Rock
 from creatures import EnemyBlob, EnemyMosquito
-
-
-def rotate_center(image, angle):
-    """
-    Поворот картинки по центру на данный угол
-    :param image:картинка
-    :param angle:угол
-    :return:картинка
-    """
-    rotated_image = pygame.transform.rotate(image, angle)
-    return rotated_image
+from pathfinding import FlowField
+from steering import BatchSteering
+from pacing import REDUCE_AI_TICK
 
 
 class BackGround(SpriteObject):
@@ -29,6 +20,15 @@ class Room(SpriteGroup):
     doors_list: list
     """класс комнаты"""
     def __init__(self, coords, game):
+        # обновляемые каждый кадр спрайты в порядке добавления, неподвижные (static)
+        # сюда не попадают
+        self.active = {}
+        # стены и камни и их прямоугольники для непрерывной проверки столкновений снарядов
+        self.solids = []
+        self.solid_rects = []
+        self.doors = []
+        self.door_rects = []
+        self.doors_opened = False
         SpriteGroup.__init__(self)
         self.coords = coords
         self.mosquito_counter = 0
@@ -36,15 +36,74 @@ class Room(SpriteGroup):
         self.setup_walls()
         self.objects_list = []
         self.enemy_group = SpriteGroup()
+        self.ai_ticks = 0
         if coords not in game.rooms_seeds_dict.keys():
-            self.seed = coords[0] + coords[1] + int(time() * 1000 % 1000000)
+            self.seed = coords[0] + coords[1] + game.random.randrange(1000000)
             game.rooms_seeds_dict[coords] = self.seed
-            self.setup_objects(self.seed)
-            self.setup_enemies(self.objects_list, self.seed)
+            spawn_enemies = True
         else:
             self.seed = game.rooms_seeds_dict[coords]
+            # в комнату, которую покинули не зачистив, враги возвращаются
+            spawn_enemies = not game.rooms_cleared.get(coords, True)
+        if game.stress is None:
             self.setup_objects(self.seed)
+            if spawn_enemies:
+                self.setup_enemies(self.objects_list, self.seed, game)
+        else:
+            game.stress.setup_objects(self, self.seed)
+            if spawn_enemies:
+                game.stress.setup_enemies(self, self.seed, game)
         self.setup_doors(self.seed)
+        self.setup_flow_field()
+        for sprite in self:
+            game.entities.track(sprite)
+
+    def update(self, game):
+        """
+        обновление комнаты, поле направлений и скорости врагов пересчитываются
+        до обновления самих врагов, под нагрузкой - через кадр
+        :param game: игра
+        """
+        self.ai_ticks += 1
+        recompute = game.pacer.level < REDUCE_AI_TICK or self.ai_ticks % 2 == 0
+        if recompute:
+            self.flow_field.update(game.player.mask_rect.center)
+        self.steering.update(self.enemy_group, game, recompute)
+        for sprite in list(self.active):
+            sprite.update(game)
+        self.wake_doors(game)
+
+    def wake_doors(self, game):
+        """
+        двери спят и обновляются, только когда комната зачищена (один раз, чтобы открыться)
+        или игрок их касается
+        :param game: игра
+        """
+        if not self.doors:
+            return
+        if not self.doors_opened and not self.enemy_group:
+            self.doors_opened = True
+            woken = self.doors
+        else:
+            woken = [self.doors[i] for i in game.player.rect.collidelistall(self.door_rects)]
+        for door in woken:
+            door.update(game)
+
+    def add_internal(self, sprite, layer=None):
+        SpriteGroup.add_internal(self, sprite, layer)
+        if not getattr(sprite, 'static', False):
+            self.active[sprite] = None
+        if isinstance(sprite, PhysicalObject):
+            self.solids.append(sprite)
+            self.solid_rects.append(sprite.mask_rect)
+
+    def remove_internal(self, sprite):
+        SpriteGroup.remove_internal(self, sprite)
+        self.active.pop(sprite, None)
+        if sprite in self.solids:
+            index = self.solids.index(sprite)
+            del self.solids[index]
+            del self.solid_rects[index]
 
     def setup_doors(self, seed):
         """
@@ -60,6 +119,8 @@ class Room(SpriteGroup):
                 door = Door(doors_coords_list[i])
                 door.close()
                 self.add(door)
+                self.doors.append(door)
+                self.door_rects.append(door.rect)
 
     def setup_walls(self):
         """установка стен"""
@@ -68,6 +129,12 @@ class Room(SpriteGroup):
                                         [(1000, 90), (0, 450)],
                                         [(135, 1000), (825, 0)]]])
 
+    def setup_flow_field(self):
+        """создание поля направлений к игроку по сетке стен и камней"""
+        self.flow_field = FlowField([sprite.rect for sprite in self
+                                     if isinstance(sprite, (Wall, Rock))])
+        self.steering = BatchSteering(self.flow_field, self.seed)
+
     def setup_objects(self, seed):
         """
         установка объектов
@@ -90,11 +157,26 @@ class Room(SpriteGroup):
                     obj_list.append(0)
             self.objects_list.append(obj_list)
 
-    def setup_enemies(self, objects_list, seed):
+    def is_cleared(self):
+        """
+        :return: bool, убиты ли все враги комнаты
+        """
+        return all(enemy.is_killed for enemy in self.enemy_group)
+
+    def add_enemy(self, enemy):
+        """
+        добавление врага в комнату
+        :param enemy: объект врага
+        """
+        self.add(enemy)
+        self.enemy_group.add(enemy)
+
+    def setup_enemies(self, objects_list, seed, game):
         """
         установка комнаты
         :param objects_list: список расставленных объектов на карте
         :param seed: сид комнаты
+        :param game: игра
         """
         random.seed(seed)
         for i in range(0, 6):
@@ -102,9 +184,7 @@ class Room(SpriteGroup):
                 if randint(0, 1) and not objects_list[i][j]:
                     number = randint(0, 6)
                     if number == 1 and self.blob_counter < 5:
-                        blob = EnemyBlob((155 + j * 85 - 30, 95 + i * 60 - 45))
-                        self.add(blob)
-                        self.enemy_group.add(blob)
+                        self.add_enemy(EnemyBlob((155 + j * 85 - 30, 95 + i * 60 - 45), game))
                         self.blob_counter += 1
 
                     elif number == 2 and self.mosquito_counter < 5:
@@ -114,14 +194,14 @@ class Room(SpriteGroup):
                         else:
                             size = 'big'
                             coords = (155 + j * 85 - 10, 95 + i * 60 - 10)
-                        mosquito = EnemyMosquito(coords, size)
-                        self.enemy_group.add(mosquito)
-                        self.add(mosquito)
+                        self.add_enemy(EnemyMosquito(coords, size, game))
                         self.mosquito_counter += 1
 
 
 class Wall(PhysicalObject, CantHurtObject):
     """класс комнаты"""
+    static = True
+
     def __init__(self, size, coords):
         PhysicalObject.__init__(self)
         CantHurtObject.__init__(self)
@@ -141,7 +221,9 @@ class Wall(PhysicalObject, CantHurtObject):
 
 
 class Door(SpriteObject):
-    """класс двери"""
+    """класс двери, обновляется комнатой только при касании игрока и зачистке комнаты"""
+    static = True
+
     def __init__(self, coords):
         image_path = 'assets/room/door-frame.png'
         SpriteObject.__init__(self, image_path, coords, 1.9)
@@ -177,8 +259,8 @@ class Door(SpriteObject):
         поворот двери
         :param angle: угол поворота
         """
-        self.image = rotate_center(self.image, angle)
-        self.closed_door_image = rotate_center(self.closed_door_image, angle)
+        self.image = load_image(self.image_path, self.size, angle=angle)
+        self.closed_door_image = load_image('assets/room/doors.png', 1.9, angle=angle)
 
     def close(self):
         """закрыть дверь"""
@@ -0,0 +1,151 @@
+import os
+import struct
+from tempfile import NamedTemporaryFile
+from threading import Thread
+
+SAVE_MAGIC = b'ESAV'
+SAVE_VERSION = 1
+HEADER = struct.Struct('<4sH')
+# сид, координаты комнаты, координаты игрока, здоровье, максимальное здоровье
+GAME = struct.Struct('<qiiiihh')
+RANDOM_STATE = struct.Struct('<625I')
+COUNT = struct.Struct('<I')
+# координаты комнаты, сид, пройдена ли комната
+ROOM = struct.Struct('<iiqB')
+# тип врага, координаты, здоровье
+ENEMY = struct.Struct('<Bffh')
+ENEMY_TYPES = ('blob', 'small', 'big')
+
+
+class SaveError(Exception):
+    """ошибка чтения сохранения"""
+    pass
+
+
+def dump_game(game):
+    """
+    сериализация состояния игры
+    :param game: объект игры
+    :return: байты сохранения
+    """
+    from creatures import EnemyBlob
+    room_coords = game.room.coords
+    enemies = [enemy for enemy in game.room.enemy_group if not enemy.is_killed]
+    rooms_cleared = {**game.rooms_cleared, room_coords: not enemies}
+    data = [HEADER.pack(SAVE_MAGIC, SAVE_VERSION),
+            GAME.pack(game.seed, *room_coords, *map(int, game.player.coords),
+                      game.player.health, game.player.max_health),
+            RANDOM_STATE.pack(*game.random.getstate()[1]),
+            COUNT.pack(len(game.rooms_seeds_dict))]
+    for coords, seed in game.rooms_seeds_dict.items():
+        data.append(ROOM.pack(*coords, seed, rooms_cleared.get(coords, True)))
+    data.append(COUNT.pack(len(enemies)))
+    for enemy in enemies:
+        enemy_type = 'blob' if isinstance(enemy, EnemyBlob) else enemy.size_type
+        data.append(ENEMY.pack(ENEMY_TYPES.index(enemy_type), *enemy.coords, enemy.health))
+    return b''.join(data)
+
+
+def write_atomic(path, data):
+    """
+    запись файла через временный файл, чтобы не оставить битое сохранение. У каждой записи
+    свой временный файл в той же папке, поэтому быстрые повторные сохранения из разных
+    потоков не портят друг другу файл
+    :param path: путь к файлу
+    :param data: байты для записи
+    """
+    with NamedTemporaryFile(dir=os.path.dirname(path) or '.', prefix=os.path.basename(path),
+                            suffix='.tmp', delete=False) as file:
+        try:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        except BaseException:
+            file.close()
+            os.remove(file.name)
+            raise
+    os.replace(file.name, path)
+
+
+def save_game(game, path, background=True):
+    """
+    сохранение игры, состояние снимается сразу, а запись на диск идет в отдельном потоке
+    :param game: объект игры
+    :param path: путь к файлу сохранения
+    :param background: писать ли файл в отдельном потоке
+    :return: поток записи или None
+    """
+    data = dump_game(game)
+    if not background:
+        write_atomic(path, data)
+        return None
+    thread = Thread(target=write_atomic, args=(path, data), daemon=True)
+    thread.start()
+    return thread
+
+
+def load_game(game, path):
+    """
+    загрузка сохранения в игру
+    :param game: объект игры
+    :param path: путь к файлу сохранения
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+    restore_game(game, data)
+
+
+def restore_game(game, data):
+    """
+    восстановление состояния игры из байтов сохранения
+    :param game: объект игры
+    :param data: байты сохранения
+    """
+    from room import Room
+    from creatures import EnemyBlob, EnemyMosquito
+    try:
+        magic, version = HEADER.unpack_from(data)
+        if magic != SAVE_MAGIC:
+            raise SaveError('Not a save file')
+        if version != SAVE_VERSION:
+            raise SaveError(f'Unsupported save version: {version}')
+        offset = HEADER.size
+        seed, room_x, room_y, player_x, player_y, health, max_health = \
+            GAME.unpack_from(data, offset)
+        offset += GAME.size
+        random_state = RANDOM_STATE.unpack_from(data, offset)
+        offset += RANDOM_STATE.size
+        rooms_count, = COUNT.unpack_from(data, offset)
+        offset += COUNT.size
+        rooms_seeds_dict = {}
+        rooms_cleared = {}
+        for x, y, room_seed, cleared in ROOM.iter_unpack(
+                data[offset:offset + rooms_count * ROOM.size]):
+            rooms_seeds_dict[(x, y)] = room_seed
+            rooms_cleared[(x, y)] = bool(cleared)
+        offset += rooms_count * ROOM.size
+        enemies_count, = COUNT.unpack_from(data, offset)
+        offset += COUNT.size
+        enemies = list(ENEMY.iter_unpack(data[offset:offset + enemies_count * ENEMY.size]))
+    except struct.error as error:
+        raise SaveError(f'Broken save file: {error}')
+
+    game.seed = seed
+    game.random.setstate((3, random_state, None))
+    game.rooms_seeds_dict = rooms_seeds_dict
+    game.rooms_cleared = rooms_cleared
+    game.gameover = False
+    game.player.revive()
+    game.player.max_health = max_health
+    game.player.health = health
+    game.player.move_to_position(player_x, player_y)
+    # враги текущей комнаты берутся из сохранения, а не расставляются по сиду заново
+    rooms_cleared[(room_x, room_y)] = True
+    game.set_room(Room((room_x, room_y), game))
+    for enemy_type, x, y, enemy_health in enemies:
+        if ENEMY_TYPES[enemy_type] == 'blob':
+            enemy = game.entities.create(EnemyBlob, (int(x), int(y)), game)
+        else:
+            enemy = game.entities.create(EnemyMosquito, (x, y), ENEMY_TYPES[enemy_type], game)
+        enemy.health = enemy_health
+        game.room.add_enemy(enemy)
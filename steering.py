@@ -0,0 +1,93 @@
+from weakref import WeakKeyDictionary
+
+import numpy as np
+
+COLLISION_CODES = {'left': -1, 'up': -1, None: 0, 'right': 1, 'down': 1}
+
+
+class BatchSteering:
+    """
+    Пакетный расчет скоростей всех врагов комнаты одним проходом numpy.
+    Повторяет EnemyMosquito.get_steering и EnemyBlob.get_steering, но для всех врагов сразу
+    """
+
+    def __init__(self, flow_field, seed):
+        """
+        :param flow_field: поле направлений комнаты
+        :param seed: сид комнаты, от него зависит разброс скоростей
+        """
+        self.flow_field = flow_field
+        self.rng = np.random.default_rng(seed)
+        self.directions = None
+        self.target_cell = None
+        self.velocities = WeakKeyDictionary()
+
+    def get_directions(self):
+        """
+        поле направлений в виде массива, пересоздается только после пересчета поля
+        :return: массив формы (клетки, 2)
+        """
+        if self.target_cell != self.flow_field.target_cell or self.directions is None:
+            self.directions = np.array(self.flow_field.directions, dtype=float)
+            self.target_cell = self.flow_field.target_cell
+        return self.directions
+
+    def compute(self, enemies, target):
+        """
+        расчет скоростей без записи в объекты
+        :param enemies: список врагов
+        :param target: центр игрока
+        :return: массив скоростей формы (враги, 2)
+        """
+        from creatures import EnemyBlob
+        count = len(enemies)
+        data = np.array([(*enemy.mask_rect.center,
+                          COLLISION_CODES[enemy.collision_direction_x],
+                          COLLISION_CODES[enemy.collision_direction_y],
+                          enemy.speed, isinstance(enemy, EnemyBlob)) for enemy in enemies],
+                        dtype=float)
+        centers = data[:, 0:2]
+        collisions = data[:, 2:4]
+        speeds = data[:, 4]
+        is_blob = data[:, 5].astype(bool)
+
+        cell_size = self.flow_field.cell_size
+        cells = np.clip(centers // cell_size, 0,
+                        (self.flow_field.columns - 1, self.flow_field.rows - 1)).astype(int)
+        directions = self.get_directions()[cells[:, 1] * self.flow_field.columns + cells[:, 0]]
+
+        # клетка игрока или недостижимая клетка, двигаемся к игроку напрямую
+        direct = ~directions.any(axis=1)
+        if direct.any():
+            delta = np.asarray(target, dtype=float) - centers[direct]
+            directions[direct] = delta / (np.hypot(delta[:, 0], delta[:, 1]) + 1)[:, None]
+
+        jitter = self.rng.integers(-20, 21, size=(count, 2)) / 100
+        directions = np.where(is_blob[:, None], np.sign(directions), directions + jitter)
+        directions[np.sign(directions) == collisions] = 0
+        return directions * speeds[:, None]
+
+    def update(self, enemies, game, recompute=True):
+        """
+        расчет скоростей и запись их во врагов, применяются в их собственном move
+        :param enemies: группа врагов
+        :param game: объект игры
+        :param recompute: False - повторить скорости прошлого расчета, обнулив те
+            составляющие, что упираются в препятствие
+        """
+        enemies = list(enemies)
+        if not enemies:
+            return
+        if recompute or any(enemy not in self.velocities for enemy in enemies):
+            velocities = self.compute(enemies, game.player.mask_rect.center)
+            self.velocities = WeakKeyDictionary(zip(enemies, velocities.tolist()))
+            for enemy in enemies:
+                enemy.velocity = self.velocities[enemy]
+            return
+        for enemy in enemies:
+            dx, dy = self.velocities[enemy]
+            if dx and COLLISION_CODES[enemy.collision_direction_x] == (dx > 0) - (dx < 0):
+                dx = 0
+            if dy and COLLISION_CODES[enemy.collision_direction_y] == (dy > 0) - (dy < 0):
+                dy = 0
+            enemy.velocity = [dx, dy]
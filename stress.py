@@ -0,0 +1,119 @@
+from math import cos, hypot, sin
+from random import Random
+
+import pygame
+
+# область, в которой расставляются враги, и сетка камней, как в Room
+SPAWN_AREA = pygame.Rect(155, 95, 620, 300)
+GRID_ROWS = 6
+GRID_COLUMNS = 8
+
+
+class StressConfig:
+    """
+    Настройки нагрузочного режима: количество врагов в комнате без ограничений Room,
+    плотность камней и частота выстрелов
+    """
+
+    def __init__(self, blobs=5, mosquitoes=5, rocks=1 / 14, volley=1, fire_rate=1,
+                 safe_radius=120):
+        """
+        :param blobs: количество слизней в новой комнате
+        :param mosquitoes: количество комаров в новой комнате
+        :param rocks: вероятность камня во внутренней клетке сетки
+        :param volley: сколько слез выпускает слизень за одну атаку
+        :param fire_rate: множитель скорострельности игрока
+        :param safe_radius: ближе этого расстояния к игроку враги не появляются
+        """
+        self.blobs = blobs
+        self.mosquitoes = mosquitoes
+        self.rocks = rocks
+        self.volley = volley
+        self.fire_rate = fire_rate
+        self.safe_radius = safe_radius
+
+    @classmethod
+    def parse(cls, text):
+        """
+        разбор настроек из строки вида blobs=100,mosquitoes=100,rocks=0.3
+        :param text: строка
+        :return: объект StressConfig
+        """
+        options = {}
+        for item in filter(None, text.split(',')):
+            name, _, value = item.partition('=')
+            if name not in ('blobs', 'mosquitoes', 'rocks', 'volley', 'fire_rate',
+                            'safe_radius'):
+                raise ValueError(f'Unknown stress option: {name}')
+            options[name] = float(value) if name in ('rocks', 'fire_rate') else int(value)
+        return cls(**options)
+
+    def apply_to_player(self, player):
+        """
+        настройка скорострельности игрока
+        :param player: объект игрока
+        """
+        player.attack_speed *= self.fire_rate
+
+    def setup_objects(self, room, seed):
+        """
+        расстановка камней по сетке Room с заданной плотностью
+        :param room: объект комнаты
+        :param seed: сид комнаты
+        """
+        from objects import Rock
+        random = Random(seed)
+        for i in range(GRID_ROWS):
+            obj_list = []
+            for j in range(GRID_COLUMNS):
+                border = i in (0, GRID_ROWS - 1) or j in (0, GRID_COLUMNS - 1)
+                if not border and random.random() < self.rocks:
+                    room.add(Rock((155 + j * 85, 95 + i * 60)))
+                    obj_list.append(1)
+                else:
+                    obj_list.append(0)
+            room.objects_list.append(obj_list)
+
+    def setup_enemies(self, room, seed, game):
+        """
+        расстановка врагов в случайных точках вне камней и подальше от игрока
+        :param room: объект комнаты
+        :param seed: сид комнаты
+        :param game: игра
+        """
+        from creatures import EnemyBlob, EnemyMosquito
+        from objects import Rock
+        random = Random(seed)
+        rocks = [sprite.rect for sprite in room if isinstance(sprite, Rock)]
+        player = game.player.mask_rect.center
+        for i in range(self.blobs + self.mosquitoes):
+            for attempt in range(20):
+                x = random.randint(SPAWN_AREA.left, SPAWN_AREA.right)
+                y = random.randint(SPAWN_AREA.top, SPAWN_AREA.bottom)
+                if hypot(x - player[0], y - player[1]) >= self.safe_radius and \
+                        pygame.Rect(x - 30, y - 30, 60, 60).collidelist(rocks) == -1:
+                    break
+            if i < self.blobs:
+                enemy = EnemyBlob((x - 30, y - 45), game)
+                enemy.volley = self.volley
+                room.blob_counter += 1
+            else:
+                enemy = EnemyMosquito((x, y), random.choice(('small', 'big')), game)
+                room.mosquito_counter += 1
+            room.add_enemy(enemy)
+
+
+def volley_directions(dx, dy, count, spread=0.25):
+    """
+    направления слез веером вокруг основного
+    :param dx: основное направление по х
+    :param dy: основное направление по у
+    :param count: количество слез
+    :param spread: угол между соседними слезами в радианах
+    :return: список направлений (dx, dy)
+    """
+    directions = []
+    for i in range(count):
+        angle = (i - (count - 1) / 2) * spread
+        directions.append((dx * cos(angle) - dy * sin(angle), dx * sin(angle) + dy * cos(angle)))
+    return directions
@@ -0,0 +1,168 @@
+import json
+import os
+from contextlib import nullcontext
+from time import perf_counter_ns
+
+import pygame
+
+
+class NullTracer:
+    """
+    Трассировка выключена: все вызовы ничего не делают
+    """
+
+    _span = nullcontext()
+
+    def span(self, name, category='phase', args=None):
+        return self._span
+
+    def instant(self, name, category='event', args=None):
+        pass
+
+    def install(self, game):
+        pass
+
+    def close(self):
+        pass
+
+
+class Span:
+    """
+    Интервал трассы, записывается при выходе из with
+    """
+
+    __slots__ = ('tracer', 'name', 'category', 'args', 'start')
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = perf_counter_ns()
+        self.tracer.add({'name': self.name, 'cat': self.category, 'ph': 'X',
+                         'ts': (self.start - self.tracer.origin) / 1000,
+                         'dur': (end - self.start) / 1000, 'pid': self.tracer.pid, 'tid': 1,
+                         **({'args': self.args} if self.args else {})})
+
+
+class ChromeTracer(NullTracer):
+    """
+    Запись трассы в формате Chrome trace events: фазы кадра, update и render каждого объекта
+    с именем его класса, смены комнат и появление сущностей. Файл открывается в
+    chrome://tracing или ui.perfetto.dev
+    """
+
+    def __init__(self, path, max_events=2000000):
+        """
+        :param path: путь к json файлу трассы
+        :param max_events: после стольких событий запись прекращается, чтобы не съесть память
+        """
+        self.path = path
+        self.max_events = max_events
+        self.events = []
+        self.pid = os.getpid()
+        self.origin = perf_counter_ns()
+        self._wrapped = []
+        self._entities = None
+
+    def add(self, event):
+        """
+        :param event: событие трассы
+        """
+        if len(self.events) < self.max_events:
+            self.events.append(event)
+
+    def span(self, name, category='phase', args=None):
+        """
+        интервал для with
+        :param name: имя
+        :param category: категория
+        :param args: дополнительные данные события
+        :return: объект Span
+        """
+        return Span(self, name, category, args)
+
+    def instant(self, name, category='event', args=None):
+        """
+        мгновенное событие
+        :param name: имя
+        :param category: категория
+        :param args: дополнительные данные события
+        """
+        self.add({'name': name, 'cat': category, 'ph': 'i', 's': 'p',
+                  'ts': (perf_counter_ns() - self.origin) / 1000, 'pid': self.pid, 'tid': 1,
+                  **({'args': args} if args else {})})
+
+    def install(self, game):
+        """
+        подмена update и render у всех классов спрайтов и групп на обертки с интервалами,
+        а EntityManager.track - на обертку с событием появления сущности
+        :param game: игра
+        """
+        # модули со спрайтами импортируются заранее: часть из них игра грузит лениво
+        # (items - при первом выпадении сердца), а обернуть можно только загруженные классы
+        import core
+        import creatures
+        import items
+        import objects
+        import room
+        import uis
+        classes = set()
+        stack = [pygame.sprite.Sprite, core.RenderableObject]
+        while stack:
+            cls = stack.pop()
+            if cls not in classes:
+                classes.add(cls)
+                stack.extend(cls.__subclasses__())
+        for cls in classes:
+            if not cls.__module__.startswith('pygame'):
+                for method_name in ('update', 'render'):
+                    if method_name in cls.__dict__:
+                        self.wrap(cls, method_name)
+
+        entities = getattr(game, 'entities', None)
+        if entities is not None:
+            track = entities.track
+
+            def traced_track(entity):
+                self.instant('spawn', 'entity', {'type': type(entity).__name__})
+                track(entity)
+            entities.track = traced_track
+            self._entities = entities
+
+    def wrap(self, cls, method_name):
+        """
+        обертка метода класса, интервал называется по классу объекта, а в args
+        пишется, чей метод выполнялся (для вызовов родительских методов)
+        :param cls: класс
+        :param method_name: имя метода
+        """
+        method = cls.__dict__[method_name]
+        qualname = method.__qualname__
+        tracer = self
+
+        def traced(obj, *args, **kwargs):
+            with Span(tracer, f'{type(obj).__name__}.{method_name}', method_name,
+                      {'method': qualname}):
+                return method(obj, *args, **kwargs)
+        setattr(cls, method_name, traced)
+        self._wrapped.append((cls, method_name, method))
+
+    def close(self):
+        """
+        возврат подмененных методов и запись трассы в файл
+        """
+        for cls, method_name, method in reversed(self._wrapped):
+            setattr(cls, method_name, method)
+        self._wrapped.clear()
+        if self._entities is not None:
+            del self._entities.track
+            self._entities = None
+        with open(self.path, 'w') as file:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, file)
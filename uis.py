@@ -2,15 +2,18 @@ import math
 import pygame
 from pygame.sprite import Sprite
 
-from core import load_image, Text
+from core import load_image, Text, create_surface
+from render import HUD
 
 
 class HealthBar(Sprite):
+    layer = HUD
+
     def __init__(self, game):
         Sprite.__init__(self)
         self.game = game
         self.player_health = game.player.health
-        self.health_surface = pygame.Surface((200, 50))
+        self.health_surface = create_surface((200, 50))
         self.health_surface.fill((40, 30, 30))
         self.health_surface.set_colorkey((30, 30, 30))
         self.rect = self.health_surface.get_rect()